@@ -0,0 +1,275 @@
+# ==============================
+# SECTION AGGREGATES – TV SHOW ANALYTICS
+# ==============================
+"""Row-level section tables, kept free of Streamlit and plotting.
+
+Each section function takes the filtered frame plus the prebuilt (row_id,
+value) long tables for the list columns and returns the dict of small tables
+its section draws. The app rolls the same tables up from the cube instead
+(see cube.py); these stay as their reference definitions, which
+check_cube.py compares the cube against. Sampling rows for point plots lives
+here too.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# EXPLODING LIST COLUMNS
+# ==============================
+def explode_lists(filtered_df, long_tables, list_columns, columns):
+    """filtered_df.explode() over list_columns, keeping only `columns`.
+
+    Reads the prebuilt long tables instead of exploding the frame, so only
+    the requested columns are repeated. Exploding several list columns gives
+    their per-row cartesian product, like chained .explode() calls. Rows with
+    an empty list are dropped rather than kept as NaN; every cuboid ignores
+    those anyway.
+    """
+    pairs = None
+    for col in list_columns:
+        table = long_tables[col]
+        table = table[table["row_id"].isin(filtered_df.index)]
+        pairs = table if pairs is None else pairs.merge(table, on="row_id")
+
+    exploded = filtered_df.loc[pairs["row_id"].to_numpy(), columns]
+    for col in list_columns:
+        exploded[col] = pairs[col].array
+    return exploded
+
+
+# ==============================
+# GENRE ANALYSIS
+# ==============================
+def top_counts(values, n):
+    counts = values.value_counts()
+    # Categorical value_counts also lists categories that never occur.
+    return counts[counts > 0].head(n)
+
+
+def genre_analysis(filtered_df, long_tables):
+    exploded = explode_lists(
+        filtered_df,
+        long_tables,
+        ["genre_names"],
+        ["user_age", "age_group", "vote_average", "popularity"],
+    )
+
+    genre_counts = top_counts(exploded["genre_names"], 10)
+
+    pivot = pd.pivot_table(
+        exploded,
+        values="popularity",
+        index="genre_names",
+        columns="age_group",
+        aggfunc="mean",
+        observed=True,
+    )
+
+    exploded["likes"] = exploded["vote_average"] > 7
+    prob_like = (
+        exploded.groupby(["user_age", "genre_names"], observed=True)["likes"]
+        .mean()
+        .reset_index()
+    )
+    prob_like = prob_like.rename(columns={"likes": "prob_like"})
+    pivot_prob = prob_like.pivot(
+        index="genre_names", columns="user_age", values="prob_like"
+    ).fillna(0)
+    pivot_prob = pivot_prob.loc[pivot_prob.mean(axis=1).sort_values(ascending=False).index]
+
+    return {
+        "genre_counts": genre_counts,
+        "pivot": pivot,
+        "pivot_prob": pivot_prob,
+    }
+
+
+# ==============================
+# BINGE WATCHING
+# ==============================
+def binge_watching(filtered_df, long_tables):
+    binge_by_age = filtered_df.groupby("user_age")["binge_prob"].mean()
+
+    exploded = explode_lists(
+        filtered_df, long_tables, ["genre_names"], ["age_band", "binge_prob"]
+    )
+    binge_by_group_genre = (
+        exploded.groupby(["age_band", "genre_names"], observed=True)["binge_prob"]
+        .mean()
+        .reset_index()
+    )
+    pivot_binge = binge_by_group_genre.pivot(
+        index="genre_names", columns="age_band", values="binge_prob"
+    ).fillna(0)
+    pivot_binge = pivot_binge.loc[pivot_binge.mean(axis=1).sort_values(ascending=False).index]
+
+    return {
+        "binge_by_age": binge_by_age,
+        "pivot_binge": pivot_binge,
+    }
+
+
+# ==============================
+# TIME OF DAY
+# ==============================
+def time_of_day(filtered_df, long_tables):
+    pivot = pd.pivot_table(
+        filtered_df[["age_band", "watch_hour"]],
+        index="age_band",
+        columns="watch_hour",
+        aggfunc="size",
+        fill_value=0,
+        observed=True,
+    )
+
+    return {"pivot": pivot}
+
+
+# ==============================
+# COUNTRY ANALYSIS
+# ==============================
+def country_analysis(filtered_df, long_tables):
+    exploded = explode_lists(
+        filtered_df, long_tables, ["origin_country"], ["user_age"]
+    )
+    top_countries = top_counts(exploded["origin_country"], 10)
+
+    age_dist_country = (
+        exploded.groupby("origin_country", observed=True)["user_age"]
+        .agg(["mean", "median", "std", "count"])
+        .reset_index()
+    )
+    age_dist_country = age_dist_country.sort_values("count", ascending=False)
+    # None when no row has an origin country.
+    top_country = age_dist_country.iloc[0]["origin_country"] if len(age_dist_country) else None
+    top_country_ages = exploded.loc[
+        exploded["origin_country"] == top_country, "user_age"
+    ]
+
+    df_exp = explode_lists(
+        filtered_df, long_tables, ["genre_names", "origin_country"], ["popularity"]
+    )
+    top_pair_countries = top_counts(df_exp["origin_country"], 10).index
+    df_top = df_exp[df_exp["origin_country"].isin(top_pair_countries)]
+    pivot = pd.pivot_table(
+        df_top,
+        values="popularity",
+        index="genre_names",
+        columns="origin_country",
+        aggfunc="mean",
+        observed=True,
+    )
+
+    return {
+        "top_countries": top_countries,
+        "top_country": top_country,
+        "top_country_ages": top_country_ages,
+        "pivot": pivot,
+    }
+
+
+# ==============================
+# TRENDS OVER TIME
+# ==============================
+def trends_over_time(filtered_df, long_tables):
+    exploded = explode_lists(
+        filtered_df, long_tables, ["genre_names"], ["year", "popularity"]
+    )
+    genre_trends = pd.pivot_table(
+        exploded,
+        values="popularity",
+        index="year",
+        columns="genre_names",
+        aggfunc="mean",
+        observed=True,
+    )
+    # A top genre may appear only on rows without a year.
+    top_genres = top_counts(exploded["genre_names"], 5).index
+    genre_trends = genre_trends[[genre for genre in top_genres if genre in genre_trends.columns]]
+
+    shows_per_year = filtered_df["first_air_year"].value_counts().sort_index()
+
+    df_time_genre = exploded.dropna(subset=["year"])
+    genre_trends_all = pd.pivot_table(
+        df_time_genre,
+        values="popularity",
+        index="year",
+        columns="genre_names",
+        aggfunc="mean",
+        observed=True,
+    )
+    top_genres_6 = top_counts(df_time_genre["genre_names"], 6).index
+    genre_trends_top = genre_trends_all[top_genres_6]
+
+    df_age_genre = explode_lists(
+        filtered_df.dropna(subset=["decade", "age_group"]),
+        long_tables,
+        ["genre_names"],
+        ["decade", "age_group", "popularity"],
+    )
+    pivot_decade = pd.pivot_table(
+        df_age_genre,
+        values="popularity",
+        index=["decade", "age_group"],
+        columns="genre_names",
+        aggfunc="mean",
+        observed=True,
+    ).reset_index()
+    decade_top_genres = top_counts(df_age_genre["genre_names"], 5).index
+
+    return {
+        "genre_trends": genre_trends,
+        "shows_per_year": shows_per_year,
+        "genre_trends_top": genre_trends_top,
+        "genre_trends_normalized": genre_trends_top / genre_trends_top.max(),
+        "pivot_decade": pivot_decade,
+        "decade_top_genres": decade_top_genres,
+    }
+
+
+# ==============================
+# SAMPLING FOR POINT PLOTS
+# ==============================
+SAMPLE_SEED = 42
+
+
+def stratified_sample(frame, n, strata, seed=SAMPLE_SEED):
+    """At most n rows of frame, each stratum keeping its share of rows.
+
+    strata holds one label per row of frame. Quotas are proportional to
+    stratum size, with the rounding remainder given to the largest
+    fractional shares. Rows within a stratum are picked by a seeded random
+    key, so a filter state always yields the same sample (and the same
+    cached chart). Rows come back in their original order.
+    """
+    total = len(frame)
+    if total <= n:
+        return frame
+
+    codes, _ = pd.factorize(np.asarray(strata), use_na_sentinel=False)
+    counts = np.bincount(codes)
+    shares = counts * (n / total)
+    quotas = np.floor(shares).astype(np.int64)
+    remainder = n - int(quotas.sum())
+    quotas[np.argsort(quotas - shares, kind="stable")[:remainder]] += 1
+
+    keys = np.random.default_rng(seed).random(total)
+    order = np.lexsort((keys, codes))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sorted_codes = codes[order]
+    rank = np.arange(total) - starts[sorted_codes]
+    keep = np.sort(order[rank < quotas[sorted_codes]])
+    return frame.iloc[keep]
+
+
+# The row-level definitions of the tables cube.finalize() builds, section by
+# section; check_cube.py compares the two.
+SECTION_AGGREGATES = {
+    "Genre Analysis": genre_analysis,
+    "Binge Watching": binge_watching,
+    "Time of Day": time_of_day,
+    "Country Analysis": country_analysis,
+    "Trends Over Time": trends_over_time,
+}
@@ -14,40 +14,303 @@ Original file is located at
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import seaborn as sns
-import ast
+import gc
+import logging
+import os
+import threading
 import warnings
 warnings.filterwarnings("ignore")
 
+from aggregates import stratified_sample
+from caching import ByteLRU
+from charts import (
+    age_hist,
+    binge_genre_heatmap,
+    chart_result,
+    corr_imshow,
+    decade_trends_lines,
+    frame_lines,
+    key_metric_distributions,
+    liking_probability_heatmap,
+    numeric_corr_heatmap,
+    numeric_pairplot,
+    pivot_heatmap,
+    pivot_imshow,
+    popularity_hist,
+    series_line,
+    session_duration_by_age,
+    start_render_pool,
+    submit_chart,
+    top_countries_barh,
+    top_countries_count,
+    top_country_age_hist,
+    top_genres_bar,
+    vote_scatter,
+)
+from cube import build_cube, cube_quantiles, cube_state, finalize, merge_cubes
+from data import (
+    LIST_COLUMNS,
+    append_long_table,
+    extend_sorted_index,
+    genre_bitmask,
+    genre_bits,
+    genre_rows,
+    genre_vocabulary,
+    list_long_table,
+    load_dataset,
+    refresh_dataset,
+    rows_outside,
+    rows_within,
+    sorted_index,
+)
+import duckdb_engine
+from kde import (
+    GRID_SIZE,
+    bin_weights,
+    binned_kde,
+    histogram_edges,
+    kde_support,
+    smoothed_density,
+)
+import polars_engine
+from streaming import stream_partials
+from timing import clock, log_spans, record, span
+
 st.set_page_config(
     page_title="TV Shows Analytics Dashboard",
     layout="wide"
 )
 
-sns.set(style="whitegrid")
+CHART_THEME = "whitegrid"
+sns.set(style=CHART_THEME)
 
 # ==============================
 # DATA LOADING
 # ==============================
-@st.cache_data
-def load_data():
-    df = pd.read_csv("10k_Poplar_Tv_Shows_with_users_updated6.csv")
-
-    df["genre_names"] = df["genre_names"].apply(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) else x
-    )
-
-    df["origin_country"] = df["origin_country"].apply(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) else x
+DATA_PATH = "10k_Poplar_Tv_Shows_with_users_updated6.csv"
+CACHE_DIR = ".cache"
+FILTER_CACHE_BYTES = 32 * 1024 * 1024
+SECTION_CACHE_ENTRIES = 256
+# Age ranges holding at most this share of rows are read off the sorted age
+# index; past it, sorting their positions costs more than a full scan.
+AGE_INDEX_MAX_SHARE = 0.125
+FIGURE_CACHE_BYTES = 256 * 1024 * 1024
+# Point plots (scatter, pairplot) above this many rows are drawn from a
+# stratified sample or as hexbins, so their cost stops growing with the data.
+PLOT_MAX_POINTS = 10_000
+# CSVs at least this large are never loaded whole: the aggregate sections
+# are computed from STREAM_CHUNK_ROWS-row chunks (see streaming.py) and the
+# sections that need individual rows are unavailable.
+STREAM_MIN_BYTES = 2 * 1024 * 1024 * 1024
+STREAM_CHUNK_ROWS = 200_000
+# Each rerun runs the script as a new module whose functions refer back to
+# its globals, so the rerun's frames (filtered_df, every section's tables)
+# end up in a reference cycle that only a full garbage collection frees. The
+# interpreter schedules those by object count and never sees the NumPy and
+# Arrow buffers behind a frame, so from this many rows on every rerun ends
+# with one, instead of old reruns piling up hundreds of MB each.
+GC_MIN_ROWS = 200_000
+# "pandas" holds the data in this process (frame, cube, indexes). The
+# QUERY_ENGINES leave it in a file under CACHE_DIR and answer the aggregate
+# sections with queries: "duckdb" from an embedded DuckDB database (see
+# duckdb_engine.py), "polars" with lazy scans of a Parquet copy (see
+# polars_engine.py). Falls back to "pandas", with a warning, when the name is
+# unknown or the engine is not installed.
+QUERY_ENGINE = os.environ.get("TVSHOWS_ENGINE", "pandas")
+QUERY_ENGINES = {"duckdb": duckdb_engine, "polars": polars_engine}
+# The numeric columns of the engines' tables, for the Overview correlations
+# (the frame's select_dtypes() picks the same ones in pandas).
+ENGINE_NUMERIC_COLUMNS = [
+    "id", "popularity", "vote_average", "vote_count", "user_age",
+    "session_duration_min", "binge_prob", "watch_hour", "first_air_year", "year", "decade",
+]
+# Worker processes drawing charts; below 2 charts are drawn in-process.
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+# Everything built from the CSV (the frame, the genre bitmask and the long
+# tables) forms one generation, shared by all sessions through
+# cache_resource instead of each unpickling a private copy. Nothing below
+# mutates a generation (filters index into it and sections derive columns
+# with .assign()); when rows are appended to the CSV, load_data() builds
+# the next one from just the new rows and swaps it in, while reruns already
+# in flight keep the one they started with.
+def build_generation(df, meta):
+    genres = genre_vocabulary(df["genre_names"])
+    # One mask per row, bit i set when the show lists genres[i]; kept
+    # beside the frame so it never shows up in tables or correlations.
+    masks = genre_bitmask(df["genre_names"], genres)
+    masks.setflags(write=False)
+    long_tables = {
+        "genre_names": list_long_table(df["genre_names"], genres),
+        "origin_country": list_long_table(df["origin_country"]),
+    }
+    return {
+        # Part of every filter key, so all caches keyed on it (filter rows,
+        # section aggregates, charts) miss once the data changes.
+        "version": meta["source_sha256"],
+        "meta": meta,
+        "df": df,
+        "genres": genres,
+        "masks": masks,
+        # (row_id, value) pairs per list column with categorical value
+        # codes, so sections join them against the filtered rows instead of
+        # exploding the frame on every rerun. Genre codes follow genres.
+        "long_tables": long_tables,
+        # Sums per (genre mask, age, ...) cell; section tables roll up from
+        # it, so their cost follows the number of cells, not rows.
+        "cube": build_cube(df, long_tables, masks),
+        "vote_index": sorted_index(df["vote_average"]),
+        "age_index": sorted_index(df["user_age"]),
+    }
+
+def extend_generation(current, df, meta, tail):
+    if tail.empty:
+        # The file was only touched, or its new bytes do not parse yet: the
+        # rows, and all built from them, stay as they are.
+        return dict(current, meta=meta, df=df)
+    genres = current["genres"]
+    if not set(genre_vocabulary(tail["genre_names"])) <= set(genres):
+        # A new genre shifts the bit layout; rebuild everything once.
+        return build_generation(df, meta)
+
+    first_row = len(current["df"])
+    tail_masks = genre_bitmask(tail["genre_names"], genres)
+    masks = np.concatenate([current["masks"], tail_masks])
+    masks.setflags(write=False)
+    tables = current["long_tables"]
+    tail_tables = {
+        "genre_names": list_long_table(tail["genre_names"], genres),
+        "origin_country": list_long_table(tail["origin_country"]),
+    }
+    return dict(
+        current,
+        version=meta["source_sha256"],
+        meta=meta,
+        df=df,
+        masks=masks,
+        long_tables={
+            col: append_long_table(tables[col], tail_tables[col]) for col in tail_tables
+        },
+        cube=merge_cubes(current["cube"], build_cube(tail, tail_tables, tail_masks)),
+        # Only the tail is sorted, then merged into the existing order.
+        vote_index=extend_sorted_index(current["vote_index"], tail["vote_average"], first_row),
+        age_index=extend_sorted_index(current["age_index"], tail["user_age"], first_row),
     )
 
-    df["first_air_date"] = pd.to_datetime(df["first_air_date"], errors="coerce")
-    df["year"] = df["first_air_date"].dt.year
+@st.cache_resource
+def load_store():
+    # Parsed once into a columnar snapshot under CACHE_DIR; later cold starts
+    # memory-map it instead of re-parsing the CSV, parsing only appended rows.
+    df, meta = load_dataset(DATA_PATH, CACHE_DIR)
+    return {"lock": threading.Lock(), "generation": build_generation(df, meta)}
 
-    return df
+def load_data():
+    # A stat() per rerun; the lock keeps two sessions from applying the same
+    # appended rows twice.
+    store = load_store()
+    with store["lock"]:
+        current = store["generation"]
+        refreshed = refresh_dataset(current["df"], current["meta"], DATA_PATH, CACHE_DIR)
+        if refreshed is not None:
+            df, meta, tail = refreshed
+            store["generation"] = (
+                build_generation(df, meta)
+                if tail is None
+                else extend_generation(current, df, meta, tail)
+            )
+        return store["generation"]
+
+@st.cache_resource(max_entries=1)
+def load_streamed(source_stamp):
+    # Keyed on the CSV's (size, mtime), so a changed file is streamed again.
+    return stream_partials(DATA_PATH, STREAM_CHUNK_ROWS)
+
+@st.cache_resource
+def resolve_engine(name):
+    # Once per server process, so a bad setting is logged once, not per
+    # rerun. logging rather than warnings, which this script ignores.
+    logger = logging.getLogger(__name__)
+    if name == "pandas":
+        return None
+    if name not in QUERY_ENGINES:
+        logger.warning(
+            "TVSHOWS_ENGINE=%r is not one of %s; using pandas.",
+            name,
+            ", ".join(["pandas", *QUERY_ENGINES]),
+        )
+        return None
+    if not QUERY_ENGINES[name].available():
+        logger.warning(
+            "TVSHOWS_ENGINE=%r needs the %s package, which is not installed; using pandas.",
+            name,
+            name,
+        )
+        return None
+    return QUERY_ENGINES[name]
+
+engine = resolve_engine(QUERY_ENGINE)
+
+@st.cache_resource(max_entries=1)
+def load_query_dataset(source_stamp):
+    # One handle per server process (a DuckDB connection, whose queries each
+    # take their own cursor, or a Parquet path).
+    handle = engine.open_dataset(DATA_PATH, CACHE_DIR, source_stamp)
+    return {"handle": handle, **engine.dataset_summary(handle)}
+
+streaming = engine is None and os.path.getsize(DATA_PATH) >= STREAM_MIN_BYTES
+# The frame is in this process only on the in-memory engine; the query
+# engines answer the sections that read rows with row-level queries.
+rows_loaded = not (streaming or engine)
+
+@st.cache_resource
+def load_figure_cache():
+    # Encoded chart images, shared by all sessions and bounded by total size.
+    return ByteLRU(FIGURE_CACHE_BYTES)
+
+@st.cache_resource
+def load_render_pool():
+    # One pool per server process, shared by all sessions; None when there
+    # are too few cores for workers to pay off.
+    return start_render_pool(RENDER_WORKERS, CHART_THEME)
+
+@st.cache_resource
+def load_filter_cache():
+    # Row positions into the frame per (data version, normalized filter
+    # state), shared by all sessions and evicted least-recently-used once
+    # FILTER_CACHE_BYTES is hit.
+    return ByteLRU(FILTER_CACHE_BYTES)
 
-df = load_data()
+# ==============================
+# TIMING
+# ==============================
+# Spans for this rerun: loading, filtering, each section's aggregation and
+# each chart drawn (timed in the worker that drew it). end_rerun() logs
+# them as one JSON line on the "timing" logger and, when asked for, lists
+# them in the sidebar.
+rerun_started = clock()
+spans = []
+
+# log_spans() logs at INFO, below the root logger's default WARNING, so
+# without logging configured elsewhere the lines are sent to stderr from
+# here. A handler on "timing" or an ancestor (e.g. from logging.basicConfig)
+# takes over instead; set the logger's level to WARNING to silence it.
+timing_logger = logging.getLogger("timing")
+if not timing_logger.hasHandlers():
+    timing_logger.addHandler(logging.StreamHandler())
+if timing_logger.level == logging.NOTSET:
+    timing_logger.setLevel(logging.INFO)
+
+NO_MATCHES = "No shows match the current filters. Try adjusting the age range or genres."
+
+def end_rerun():
+    if rows_loaded and len(df) >= GC_MIN_ROWS:
+        with span(spans, "gc") as counts:
+            counts["objects"] = gc.collect()
+    record(spans, "rerun", rerun_started, section=section)
+    log_spans(spans, section=section, filter_key=filter_key)
+    if st.sidebar.checkbox("Show timings", key="show_timings"):
+        st.sidebar.dataframe(pd.DataFrame(spans), hide_index=True)
 
 # ==============================
 # SIDEBAR – NAV + FILTERS
@@ -66,72 +329,326 @@ section = st.sidebar.radio(
         "Additional Analyses"
     ]
 )
+# The sections that read individual rows (or, under a query engine, query
+# them); the rest only draw aggregates.
+ROW_SECTIONS = {"Overview", "User Age Analysis", "Additional Analyses"}
+
+# Filters resolve to an array of row positions in df, memoized per
+# normalized filter state so reruns that only switch section (or revisit a
+# filter state any session has used) skip the mask entirely. Only the
+# sections that read rows materialize them, with a single take (none when no
+# filter is active); the rest are served from the cube and never copy the
+# frame. Sections derive their extra columns with .assign().
+def filter_mask(filter_key, rows=slice(None)):
+    # Which of the given row positions (default: all) pass the filters.
+    _, age_range, selected_bits = filter_key
+    row_mask = np.ones(len(df), dtype=bool)[rows]
+
+    if selected_bits:
+        row_mask &= genre_rows(genre_masks[rows], selected_bits)
+
+    if age_range is not None:
+        ages = df["user_age"].to_numpy()[rows]
+        row_mask &= (ages >= age_range[0]) & (ages <= age_range[1])
+
+    return row_mask
+
+def compute_filter_rows(filter_key):
+    _, age_range, selected_bits = filter_key
+    # A narrow age range is one slice of the age index, and the genre test
+    # then only looks at the rows in it; wide ones scan every row.
+    rows = None
+    if age_range is not None:
+        rows = rows_within(
+            data["age_index"], *age_range, limit=int(len(df) * AGE_INDEX_MAX_SHARE)
+        )
+    if rows is None:
+        rows = np.flatnonzero(filter_mask(filter_key))
+    elif selected_bits:
+        rows = rows[genre_rows(genre_masks[rows], selected_bits)]
+    rows.setflags(write=False)
+    return rows
+
+def filter_rows(filter_key):
+    return load_filter_cache().get_or_compute(
+        filter_key, lambda: compute_filter_rows(filter_key)
+    )
 
-# ---- Global filters (age range + genres) ----
-age_min = int(df["user_age"].min()) if "user_age" in df.columns else 0
-age_max = int(df["user_age"].max()) if "user_age" in df.columns else 100
-
-all_genres = sorted(
-    {g for lst in df["genre_names"].dropna() for g in lst}
-) if "genre_names" in df.columns else []
-
-# Init session_state defaults
-if "age_filter" not in st.session_state:
-    st.session_state["age_filter"] = (age_min, age_max)
-if "genre_filter" not in st.session_state:
-    st.session_state["genre_filter"] = []
-
-def reset_filters():
-    st.session_state["age_filter"] = (age_min, age_max)
-    st.session_state["genre_filter"] = []
-
-st.sidebar.markdown("---")
-st.sidebar.subheader("Filters")
-
-# Age group (range) filter
-if age_min < age_max:
-    age_filter = st.sidebar.slider(
-        "User age range",
-        age_min,
-        age_max,
-        st.session_state["age_filter"],
-        key="age_filter",
+def filtered_frame(filter_key):
+    rows = filter_rows(filter_key)
+    return df if len(rows) == len(df) else df.take(rows)
+
+def section_frame():
+    # The filtered rows as a frame, for the sections that read them; None
+    # under a query engine, whose rows stay in its file.
+    if engine is not None:
+        return None
+    with span(spans, "take") as counts:
+        frame = filtered_frame(filter_key)
+        counts["rows"] = len(frame)
+    return frame
+
+if streaming:
+    # Too large to load: no rows, so no filters; sections that aggregate are
+    # drawn from the streamed state and the rest say why they are empty.
+    stat = os.stat(DATA_PATH)
+    with span(spans, "load_streamed", bytes=stat.st_size):
+        streamed = load_streamed((stat.st_size, stat.st_mtime_ns))
+    filter_key = (("stream", stat.st_size, stat.st_mtime_ns), None, 0)
+    st.sidebar.markdown("---")
+    st.sidebar.info(
+        "The data file is too large to load, so filters are off and only "
+        "whole-dataset aggregates are shown."
     )
 else:
-    age_filter = (age_min, age_max)
-
-# Genre filter
-selected_genres = st.sidebar.multiselect(
-    "Genres",
-    options=all_genres,
-    default=st.session_state["genre_filter"],
-    key="genre_filter",
-    help="Leave empty to include all genres.",
-)
-
-# Reset button
-if st.sidebar.button("Reset filters"):
-    reset_filters()
-
-# Apply filters to a working dataframe
-filtered_df = df.copy()
-
-if "user_age" in filtered_df.columns and age_filter:
-    filtered_df = filtered_df[
-        (filtered_df["user_age"] >= age_filter[0])
-        & (filtered_df["user_age"] <= age_filter[1])
-    ]
+    if engine is not None:
+        stat = os.stat(DATA_PATH)
+        with span(spans, "load_query_dataset", engine=QUERY_ENGINE, bytes=stat.st_size):
+            dataset = load_query_dataset((stat.st_size, stat.st_mtime_ns))
+        version = (QUERY_ENGINE, stat.st_size, stat.st_mtime_ns)
+        has_ages = True
+        age_min, age_max = dataset["age_min"], dataset["age_max"]
+        all_genres = dataset["genres"]
+    else:
+        with span(spans, "load_data") as counts:
+            data = load_data()
+            df = data["df"]
+            counts["rows"] = len(df)
+        version = data["version"]
+        has_ages = "user_age" in df.columns
+
+        # ---- Global filters (age range + genres) ----
+        age_min = int(df["user_age"].min()) if has_ages else 0
+        age_max = int(df["user_age"].max()) if has_ages else 100
+
+        all_genres, genre_masks = data["genres"], data["masks"]
+
+    # Init session_state defaults
+    if "age_filter" not in st.session_state:
+        st.session_state["age_filter"] = (age_min, age_max)
+    if "genre_filter" not in st.session_state:
+        st.session_state["genre_filter"] = []
+
+    def reset_filters():
+        st.session_state["age_filter"] = (age_min, age_max)
+        st.session_state["genre_filter"] = []
+
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Filters")
+
+    # Age group (range) filter
+    if age_min < age_max:
+        age_filter = st.sidebar.slider(
+            "User age range",
+            age_min,
+            age_max,
+            st.session_state["age_filter"],
+            key="age_filter",
+        )
+    else:
+        age_filter = (age_min, age_max)
+
+    # Genre filter
+    selected_genres = st.sidebar.multiselect(
+        "Genres",
+        options=all_genres,
+        default=st.session_state["genre_filter"],
+        key="genre_filter",
+        help="Leave empty to include all genres.",
+    )
 
-if selected_genres:
-    def has_selected_genre(genres):
-        if isinstance(genres, list):
-            return any(g in selected_genres for g in genres)
-        return False
+    # Reset button
+    if st.sidebar.button("Reset filters"):
+        reset_filters()
 
-    filtered_df = filtered_df[filtered_df["genre_names"].apply(has_selected_genre)]
+    if has_ages and age_filter:
+        age_range = (max(int(age_filter[0]), age_min), min(int(age_filter[1]), age_max))
+        if age_range == (age_min, age_max):
+            age_range = None
+    else:
+        age_range = None
+
+    selected_bits = genre_bits(selected_genres, all_genres)
+    filter_key = (version, age_range, selected_bits)
+
+    if engine is None:
+        with span(spans, "filter", rows_in=len(df)) as counts:
+            counts["rows_out"] = len(filter_rows(filter_key))
+
+        if not counts["rows_out"]:
+            st.warning(NO_MATCHES)
+            end_rerun()
+            st.stop()
+
+# Rendered charts are cached as PNG bytes keyed by (chart id, filter key,
+# theme). A hit is shown straight away; a miss reserves the chart's place on
+# the page and is handed to the render pool as (function, data), so a
+# section's charts draw side by side. flush_charts() then fills the places
+# in page order. The data passed must depend on nothing but the filter key.
+pending_charts = []
+
+def show_chart(chart_id, draw, *args):
+    key = (chart_id, filter_key, CHART_THEME)
+    slot = st.empty()
+    png = load_figure_cache().get(key)
+    if png is not None:
+        slot.image(png, width="stretch")
+        return
+    future = submit_chart(load_render_pool(), draw, args)
+    pending_charts.append((key, slot, future, draw, args))
+
+def flush_charts():
+    for key, slot, future, draw, args in pending_charts:
+        png, timing = chart_result(future, draw, args)
+        spans.append({"span": f"chart {key[0]}", **timing, "png_bytes": len(png)})
+        load_figure_cache().put(key, png)
+        slot.image(png, width="stretch")
+    pending_charts.clear()
+
+def filter_genres(selected_bits):
+    # The genre names behind a filter key's genre bits.
+    return [g for i, g in enumerate(dataset["genres"]) if selected_bits >> i & 1]
+
+# The partial state (see cube.py) of the rows passing the filters, rolled
+# up from the cube, queried from the engine or streamed, and cached on the
+# hashable filter key rather than on the frame.
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def filter_state(filter_key):
+    if streaming:
+        return streamed
+    _, age_range, selected_bits = filter_key
+    if engine is not None:
+        return engine.query_state(dataset["handle"], age_range, filter_genres(selected_bits))
+    return cube_state(data["cube"], age_range, selected_bits)
+
+# One section's tables for a filter state (the same tables grouping the
+# filtered rows would give), built only when that section is shown, so
+# revisiting it for a seen filter state only redraws and a table that
+# cannot be built for a filter state leaves the other sections alone.
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def filter_aggregates(section, filter_key):
+    return finalize(filter_state(filter_key), section)
+
+def section_aggregates(section, filter_key):
+    with span(spans, f"aggregate {section}"):
+        return filter_aggregates(section, filter_key)
+
+# One of the query engine's row-level queries (query_profile, query_bins, ...)
+# over the rows passing the filters, cached like the aggregates.
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def engine_query(name, filter_key, *args):
+    _, age_range, selected_bits = filter_key
+    query = getattr(engine, name)
+    return query(dataset["handle"], age_range, filter_genres(selected_bits), *args)
+
+def column_profile(filter_key):
+    # Missing counts of every column; count, mean, std, range and quartiles
+    # of the numeric ones.
+    return engine_query("query_profile", filter_key, ENGINE_NUMERIC_COLUMNS)
+
+def engine_rows(filter_key):
+    # Rows passing the filters: each either has an id or is missing one.
+    stats = column_profile(filter_key).loc["id"]
+    return int(stats["count"] + stats["missing"])
+
+# The row sections below take their values through these helpers, from the
+# filtered frame (frame) or, when it is None, from the query engine; either
+# way the result is the same.
+def column_histogram(frame, column, bins):
+    # np.histogram() of the column's values: (counts, edges).
+    if frame is not None:
+        return np.histogram(frame[column].dropna(), bins)
+    stats = column_profile(filter_key).loc[column]
+    edges = histogram_edges(
+        stats["count"], stats["min"], stats["max"], stats["q1"], stats["q3"], bins
+    )
+    n_bins = len(edges) - 1
+    positions, rows, _ = engine_query(
+        "query_bins", filter_key, column, edges[0], n_bins / (edges[-1] - edges[0]), n_bins
+    )
+    return np.bincount(positions, rows, n_bins).astype(np.int64), edges
+
+def first_rows(frame, n):
+    if frame is not None:
+        return frame.head(n)
+    return engine_query("query_rows", filter_key, None, n)
+
+def column_means(frame, key, column):
+    # Mean of column per value of key.
+    if frame is not None:
+        return frame.groupby(key)[column].mean()
+    return engine_query("query_means", filter_key, key, column)
+
+def column_corr(frame, columns):
+    if frame is not None:
+        return frame[columns].corr()
+    return engine_query("query_corr", filter_key, columns)
+
+# KDE curves per (column, filter key), shared by every chart that draws the
+# density of that column. Under a query engine only the values' statistics
+# and their per-grid-point counts come back.
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def density_curve(column, filter_key):
+    if engine is None:
+        return binned_kde(filtered_frame(filter_key)[column])
+    stats = column_profile(filter_key).loc[column]
+    found = kde_support(stats["count"], stats["std"], stats["min"], stats["max"])
+    if found is None:
+        return None
+    support, bw = found
+    positions, rows, fracs = engine_query(
+        "query_bins", filter_key, column, support[0], 1 / (support[1] - support[0]), GRID_SIZE - 1
+    )
+    weights = bin_weights(positions, rows, fracs, GRID_SIZE)
+    return support, smoothed_density(support, bw, weights, stats["count"])
+
+# IQR outliers: quartiles from the cube's vote_average sketch, then only the
+# rows beyond the fences, read off the sorted index and checked against the
+# filters, instead of sorting and scanning the filtered frame. The quartiles
+# are within half a sketch bucket of exact, so the fences are within two
+# buckets (0.2 on the vote scale). A query engine computes exact quartiles
+# and returns only the rows beyond the fences.
+@st.cache_data(max_entries=SECTION_CACHE_ENTRIES, show_spinner=False)
+def vote_outliers(filter_key):
+    columns = ["id", "name", "vote_average"]
+    if engine is not None:
+        stats = column_profile(filter_key).loc["vote_average"]
+        iqr = stats["q3"] - stats["q1"]
+        fences = (stats["q1"] - 1.5 * iqr, stats["q3"] + 1.5 * iqr)
+        return engine_query("query_rows", filter_key, columns, None, ("vote_average", *fences))
+    _, age_range, selected_bits = filter_key
+    q1, q3 = cube_quantiles(
+        data["cube"], "vote_average", [0.25, 0.75], age_range, selected_bits
+    )
+    iqr = q3 - q1
+    rows = rows_outside(data["vote_index"], q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    rows = rows[filter_mask(filter_key, rows)]
+    return df.take(rows)[columns]
+
+# The profile is one scan, which the row sections read anyway; the aggregate
+# sections' state is only queried for them.
+if engine is not None and not engine_rows(filter_key):
+    st.warning(NO_MATCHES)
+    end_rerun()
+    st.stop()
 
-if filtered_df.empty:
-    st.warning("No shows match the current filters. Try adjusting the age range or genres.")
+# Streamed, only the sections drawn from filter_aggregates() can be drawn.
+if streaming and section in ROW_SECTIONS:
+    if section == "Overview":
+        st.title("📺 TV Shows Analytics Dashboard")
+        overview = filter_aggregates("Overview", filter_key)
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            st.metric("Total Shows", overview["rows"])
+        with col_b:
+            st.metric("Average Vote", round(overview["vote_average"], 2))
+        with col_c:
+            st.metric("Average Popularity", round(overview["popularity"], 2))
+    st.info(
+        f"{section} needs individual rows, which are not loaded for a data file "
+        "this large."
+    )
+    end_rerun()
     st.stop()
 
 # ==============================
@@ -139,112 +656,127 @@ if filtered_df.empty:
 # ==============================
 if section == "Overview":
     st.title("📺 TV Shows Analytics Dashboard")
+    filtered_df = section_frame()
 
     st.write("### Dataset Overview")
+    if filtered_df is not None:
+        total_shows = filtered_df.shape[0]
+        average_vote = filtered_df["vote_average"].mean()
+        average_popularity = filtered_df["popularity"].mean()
+    else:
+        profile = column_profile(filter_key)
+        total_shows = engine_rows(filter_key)
+        average_vote = profile.loc["vote_average", "mean"]
+        average_popularity = profile.loc["popularity", "mean"]
     col_a, col_b, col_c = st.columns(3)
     with col_a:
-        st.metric("Total Shows", filtered_df.shape[0])
+        st.metric("Total Shows", total_shows)
     with col_b:
-        st.metric("Average Vote", round(filtered_df["vote_average"].mean(), 2))
+        st.metric("Average Vote", round(average_vote, 2))
     with col_c:
-        st.metric("Average Popularity", round(filtered_df["popularity"].mean(), 2))
+        st.metric("Average Popularity", round(average_popularity, 2))
 
     st.write("### Sample Data")
-    st.dataframe(filtered_df.head(20))
+    sample = first_rows(filtered_df, 20)
+    # List columns are Arrow-backed; hand st.dataframe plain lists to render.
+    st.dataframe(sample.assign(**{c: sample[c].tolist() for c in LIST_COLUMNS}))
+
+    curves = {
+        col: density_curve(col, filter_key)
+        for col in ["popularity", "vote_average", "vote_count"]
+    }
 
     # Additional plots from projet_python_v2.py
     st.write("### Histogram of Popularity Scores")
-    fig, ax = plt.subplots()
-    ax.hist(filtered_df["popularity"].dropna(), bins=30)
-    ax.set_xlabel("Popularity Score")
-    ax.set_ylabel("Number of Shows")
-    ax.set_title("Histogram of Popularity Scores")
-    st.pyplot(fig)
+    show_chart(
+        "overview/popularity_hist",
+        popularity_hist,
+        column_histogram(filtered_df, "popularity", 30),
+    )
 
     st.write("### Distributions of Key Metrics")
-    fig, axs = plt.subplots(1, 3, figsize=(15, 4))
-    sns.histplot(filtered_df["popularity"].dropna(), kde=True, ax=axs[0])
-    axs[0].set_title("Distribution of Popularity")
-    sns.histplot(filtered_df["vote_average"].dropna(), kde=True, ax=axs[1])
-    axs[1].set_title("Distribution of Vote Average")
-    sns.histplot(filtered_df["vote_count"].dropna(), kde=False, ax=axs[2])
-    axs[2].set_yscale("log")
-    axs[2].set_title("Distribution of Vote Count (Log Scale)")
-    st.pyplot(fig)
+    show_chart(
+        "overview/distributions",
+        key_metric_distributions,
+        column_histogram(filtered_df, "popularity", "auto"),
+        column_histogram(filtered_df, "vote_average", "auto"),
+        column_histogram(filtered_df, "vote_count", "auto"),
+        curves,
+    )
 
     st.write("### Pairplot of Numeric Features")
-    pair_df = filtered_df[["popularity", "vote_average", "vote_count"]].dropna()
-    if not pair_df.empty:
-        fig = sns.pairplot(
-            pair_df,
-            diag_kind="kde",
-            corner=True,
+    pair_columns = ["popularity", "vote_average", "vote_count"]
+    if filtered_df is not None:
+        pair_df = filtered_df[pair_columns].dropna()
+        # Sampled per viewer age so every age keeps its share of points.
+        pair_sample = stratified_sample(
+            pair_df, PLOT_MAX_POINTS, filtered_df.loc[pair_df.index, "user_age"]
+        )
+        pair_rows = len(pair_df)
+    else:
+        # Every k-th complete row, so the sample spans the file.
+        pair_sample, pair_rows = engine_query(
+            "query_sample", filter_key, pair_columns, PLOT_MAX_POINTS
         )
-        st.pyplot(fig)
+    if pair_rows:
+        show_chart("overview/pairplot", numeric_pairplot, pair_sample, pair_rows, curves)
     else:
         st.info("Not enough data for pairplot with current filters.")
 
     st.write("### Correlation Heatmap of Numeric Features")
-    numeric_df = filtered_df.select_dtypes(include=[np.number])
-    corr = numeric_df.corr()
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(corr, annot=True, fmt=".2f", cmap="coolwarm", ax=ax)
-    ax.set_title("Correlation Heatmap of Numeric Features")
-    st.pyplot(fig)
+    numeric_cols = (
+        ENGINE_NUMERIC_COLUMNS
+        if filtered_df is None
+        else filtered_df.select_dtypes(include=[np.number]).columns
+    )
+    show_chart(
+        "overview/corr_heatmap", numeric_corr_heatmap, column_corr(filtered_df, numeric_cols)
+    )
 
 # ==============================
 # USER AGE ANALYSIS
 # ==============================
 elif section == "User Age Analysis":
     st.title("👥 User Age Analysis")
+    filtered_df = section_frame()
 
     col1, col2 = st.columns(2)
 
     with col1:
-        fig, ax = plt.subplots()
-        ax.hist(filtered_df["user_age"].dropna(), bins=20)
-        ax.set_title("Histogram of User Ages")
-        ax.set_xlabel("Age")
-        ax.set_ylabel("Count")
-        st.pyplot(fig)
+        show_chart("user_age/age_hist", age_hist, column_histogram(filtered_df, "user_age", 20))
 
     with col2:
-        fig, ax = plt.subplots()
-        ax.scatter(filtered_df["vote_average"], filtered_df["vote_count"])
-        ax.set_xlabel("Vote Average")
-        ax.set_ylabel("Vote Count")
-        ax.set_title("Vote Average vs Vote Count")
-        st.pyplot(fig)
+        if filtered_df is not None:
+            show_chart(
+                "user_age/vote_scatter",
+                vote_scatter,
+                filtered_df["vote_average"],
+                filtered_df["vote_count"],
+                PLOT_MAX_POINTS,
+            )
+        else:
+            votes, vote_rows = engine_query(
+                "query_sample", filter_key, ["vote_average", "vote_count"], PLOT_MAX_POINTS
+            )
+            show_chart(
+                "user_age/vote_scatter",
+                vote_scatter,
+                votes["vote_average"],
+                votes["vote_count"],
+                PLOT_MAX_POINTS,
+                vote_rows,
+            )
 
     # Additional plots
     st.write("### Average Viewing Session Duration per Age")
-    if "session_duration_min" in filtered_df.columns:
-        age_duration = (
-            filtered_df.groupby("user_age")["session_duration_min"]
-            .mean()
-            .reset_index()
-        )
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.scatter(age_duration["user_age"], age_duration["session_duration_min"])
-        ax.set_title("Average Viewing Session Duration per Age")
-        ax.set_xlabel("User Age")
-        ax.set_ylabel("Average Duration (min)")
-        ax.grid(True)
-        st.pyplot(fig)
+    if filtered_df is None or "session_duration_min" in filtered_df.columns:
+        age_duration = column_means(filtered_df, "user_age", "session_duration_min")
+        show_chart("user_age/session_duration", session_duration_by_age, age_duration)
 
     st.write("### Correlation Heatmap of Numerical Features")
     numeric_cols = ["popularity", "vote_average", "vote_count", "user_age"]
-    existing_cols = [c for c in numeric_cols if c in filtered_df.columns]
-    corr = filtered_df[existing_cols].corr()
-    fig, ax = plt.subplots()
-    im = ax.imshow(corr)
-    ax.set_xticks(range(len(existing_cols)))
-    ax.set_xticklabels(existing_cols, rotation=45)
-    ax.set_yticks(range(len(existing_cols)))
-    ax.set_yticklabels(existing_cols)
-    plt.colorbar(im)
-    ax.set_title("Correlation Heatmap of Numerical Features")
-    st.pyplot(fig)
+    existing_cols = [c for c in numeric_cols if filtered_df is None or c in filtered_df.columns]
+    show_chart("user_age/corr_heatmap", corr_imshow, column_corr(filtered_df, existing_cols))
 
 # ==============================
 # GENRE ANALYSIS
@@ -252,83 +784,34 @@ elif section == "User Age Analysis":
 elif section == "Genre Analysis":
     st.title("🎭 Genre Analysis")
 
-    exploded = filtered_df.explode("genre_names")
-
-    genre_counts = exploded["genre_names"].value_counts().head(10)
+    agg = section_aggregates(section, filter_key)
 
-    fig, ax = plt.subplots()
-    genre_counts.plot(kind="bar", ax=ax)
-    ax.set_title("Top 10 Genres")
-    ax.set_xlabel("Genre")
-    ax.set_ylabel("Number of Shows")
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    show_chart("genre/top_genres", top_genres_bar, agg["genre_counts"])
 
     st.write("### Genre vs Age Group Popularity")
 
-    bins = [12, 17, 24, 34, 44, 54, 70]
-    labels = [
-        "Teen (13–17)",
-        "Young Adult (18–24)",
-        "Adult (25–34)",
-        "Mid Adult (35–44)",
-        "Older Adult (45–54)",
-        "Senior (55–70)",
-    ]
-    ga_df = filtered_df.copy()
-    ga_df["age_group"] = pd.cut(ga_df["user_age"], bins=bins, labels=labels)
-
-    pivot = pd.pivot_table(
-        ga_df.explode("genre_names"),
-        values="popularity",
-        index="genre_names",
-        columns="age_group",
-        aggfunc="mean",
+    show_chart(
+        "genre/age_group_heatmap",
+        pivot_heatmap,
+        agg["pivot"],
+        "Average Genre Popularity by Age Group",
+        "coolwarm",
+        (10, 6),
     )
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.heatmap(pivot, cmap="coolwarm", ax=ax)
-    ax.set_title("Average Genre Popularity by Age Group")
-    st.pyplot(fig)
-
     # Additional plots
     st.write("### Genre Liking Probability by Age")
-    exploded["likes"] = exploded["vote_average"] > 7
-    prob_like = (
-        exploded.groupby(["user_age", "genre_names"])["likes"].mean().reset_index()
-    )
-    prob_like = prob_like.rename(columns={"likes": "prob_like"})
-    pivot_prob = prob_like.pivot(
-        index="genre_names", columns="user_age", values="prob_like"
-    ).fillna(0)
-    pivot_prob = pivot_prob.loc[pivot_prob.mean(axis=1).sort_values(ascending=False).index]
-    fig, ax = plt.subplots(figsize=(20, 15))
-    sns.heatmap(pivot_prob, cmap="YlGnBu", annot=False, linewidths=0.5, ax=ax)
-    ax.set_title("Genre Liking Probability by Age")
-    ax.set_xlabel("User Age")
-    ax.set_ylabel("Genre")
-    plt.xticks(rotation=45)
-    plt.yticks(rotation=0)
-    st.pyplot(fig)
+    show_chart("genre/liking_probability", liking_probability_heatmap, agg["pivot_prob"])
 
     st.write("### Average Genre Popularity by Age Group (Alternative View)")
-    df_genre_age = ga_df.explode("genre_names")
-    pivot_genre_age = pd.pivot_table(
-        df_genre_age,
-        values="popularity",
-        index="genre_names",
-        columns="age_group",
-        aggfunc="mean",
+    # Same pivot as the heatmap above, drawn with imshow.
+    show_chart(
+        "genre/age_group_imshow",
+        pivot_imshow,
+        agg["pivot"],
+        "Average Genre Popularity by Age Group",
+        "Average Popularity",
     )
-    fig, ax = plt.subplots(figsize=(12, 6))
-    im = ax.imshow(pivot_genre_age, aspect="auto")
-    ax.set_xticks(range(len(pivot_genre_age.columns)))
-    ax.set_xticklabels(pivot_genre_age.columns, rotation=45)
-    ax.set_yticks(range(len(pivot_genre_age.index)))
-    ax.set_yticklabels(pivot_genre_age.index)
-    plt.colorbar(im, label="Average Popularity")
-    ax.set_title("Average Genre Popularity by Age Group")
-    st.pyplot(fig)
 
 # ==============================
 # BINGE WATCHING
@@ -336,42 +819,20 @@ elif section == "Genre Analysis":
 elif section == "Binge Watching":
     st.title("🍿 Binge Watching Analysis")
 
-    bw_df = filtered_df.copy()
-    bw_df["is_binge"] = (bw_df["popularity"] > 50) & (bw_df["vote_count"] > 1000)
-    bw_df["binge_prob"] = bw_df["is_binge"].astype(int) * (1 - bw_df["user_age"] / 100)
-
-    binge_by_age = bw_df.groupby("user_age")["binge_prob"].mean()
+    agg = section_aggregates(section, filter_key)
 
-    fig, ax = plt.subplots()
-    ax.plot(binge_by_age.index, binge_by_age.values)
-    ax.set_xlabel("Age")
-    ax.set_ylabel("Binge Probability")
-    ax.set_title("Binge Watching Probability by Age")
-    st.pyplot(fig)
+    show_chart(
+        "binge/by_age",
+        series_line,
+        agg["binge_by_age"],
+        "Binge Watching Probability by Age",
+        "Age",
+        "Binge Probability",
+    )
 
     # Additional plots
     st.write("### Binge-Watching Probability by Age Group and Genre")
-    exploded = bw_df.explode("genre_names")
-    exploded["age_group"] = pd.cut(
-        exploded["user_age"], bins=[0, 20, 40, 60, 100], labels=["0-20", "21-40", "41-60", "61+"]
-    )
-    binge_by_group_genre = (
-        exploded.groupby(["age_group", "genre_names"])["binge_prob"]
-        .mean()
-        .reset_index()
-    )
-    pivot_binge = binge_by_group_genre.pivot(
-        index="genre_names", columns="age_group", values="binge_prob"
-    ).fillna(0)
-    pivot_binge = pivot_binge.loc[pivot_binge.mean(axis=1).sort_values(ascending=False).index]
-    fig, ax = plt.subplots(figsize=(12, 15))
-    sns.heatmap(pivot_binge, cmap="YlOrRd", annot=True, fmt=".2f", linewidths=0.5, ax=ax)
-    ax.set_title("Binge-Watching Probability by Age Group and Genre")
-    ax.set_xlabel("Age Group")
-    ax.set_ylabel("Genre")
-    plt.xticks(rotation=45)
-    plt.yticks(rotation=0)
-    st.pyplot(fig)
+    show_chart("binge/age_group_genre", binge_genre_heatmap, agg["pivot_binge"])
 
 # ==============================
 # TIME OF DAY
@@ -379,107 +840,51 @@ elif section == "Binge Watching":
 elif section == "Time of Day":
     st.title("⏰ Time of Day Watching Patterns")
 
-    def sim_hour(age):
-        if age < 20:
-            mean = 21
-        elif age < 40:
-            mean = 20
-        else:
-            mean = 19
-        return int(np.random.normal(mean, 2)) % 24
-
-    np.random.seed(42)
-    td_df = filtered_df.copy()
-    td_df["watch_hour"] = td_df["user_age"].apply(sim_hour)
+    agg = section_aggregates(section, filter_key)
 
-    td_df["age_group"] = pd.cut(
-        td_df["user_age"],
-        bins=[0, 20, 40, 60, 100],
-        labels=["0-20", "21-40", "41-60", "61+"],
+    show_chart(
+        "time_of_day/heatmap",
+        pivot_heatmap,
+        agg["pivot"],
+        "Watching Time Heatmap",
+        "YlGnBu",
+        (12, 6),
     )
 
-    pivot = pd.pivot_table(
-        td_df,
-        index="age_group",
-        columns="watch_hour",
-        aggfunc="size",
-        fill_value=0,
-    )
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.heatmap(pivot, cmap="YlGnBu", ax=ax)
-    ax.set_title("Watching Time Heatmap")
-    st.pyplot(fig)
-
 # ==============================
 # COUNTRY ANALYSIS
 # ==============================
 elif section == "Country Analysis":
     st.title("🌍 Country Analysis")
 
-    exploded = filtered_df.explode("origin_country")
-    top_countries = exploded["origin_country"].value_counts().head(10)
+    agg = section_aggregates(section, filter_key)
+    top_countries = agg["top_countries"]
+
+    if agg["top_country"] is None:
+        st.info("None of the shows matching the current filters lists an origin country.")
+    else:
+        show_chart("country/top_countries", top_countries_barh, top_countries)
+
+        # Additional plots
+        st.write("### Age Distribution for Top Country")
+        show_chart(
+            "country/top_country_ages",
+            top_country_age_hist,
+            agg["top_country"],
+            agg["top_country_ages"],
+        )
 
-    fig, ax = plt.subplots()
-    top_countries.plot(kind="barh", ax=ax)
-    ax.set_title("Top 10 Countries by Number of Shows")
-    st.pyplot(fig)
+        st.write("### Count of TV Shows by Origin Country (Top 10)")
+        show_chart("country/top_countries_count", top_countries_count, top_countries)
 
-    # Additional plots
-    st.write("### Age Distribution for Top Country")
-    age_dist_country = (
-        exploded.groupby("origin_country")["user_age"]
-        .agg(["mean", "median", "std", "count"])
-        .reset_index()
-    )
-    age_dist_country = age_dist_country.sort_values("count", ascending=False)
-    top_country = age_dist_country.iloc[0]["origin_country"]
-    fig, ax = plt.subplots(figsize=(10, 6))
-    exploded[exploded["origin_country"] == top_country]["user_age"].hist(
-        bins=20, ax=ax
-    )
-    ax.set_title(f"Age Distribution for {top_country}")
-    ax.set_xlabel("Age")
-    ax.set_ylabel("Frequency")
-    ax.grid(True)
-    st.pyplot(fig)
-
-    st.write("### Count of TV Shows by Origin Country (Top 10)")
-    df_country = filtered_df.explode("origin_country")
-    top_countries = df_country["origin_country"].value_counts().head(10).index
-    df_country_top = df_country[df_country["origin_country"].isin(top_countries)]
-    fig, ax = plt.subplots(figsize=(10, 5))
-    sns.countplot(
-        y="origin_country",
-        data=df_country_top,
-        order=top_countries,
-        ax=ax,
-    )
-    ax.set_title("Count of TV Shows by Origin Country (Top 10)")
-    ax.set_xlabel("Number of Shows")
-    ax.set_ylabel("Country")
-    st.pyplot(fig)
-
-    st.write("### Average Genre Popularity by Country (Top 10 Countries)")
-    df_exp = filtered_df.explode("genre_names").explode("origin_country")
-    top_countries = df_exp["origin_country"].value_counts().head(10).index
-    df_top = df_exp[df_exp["origin_country"].isin(top_countries)]
-    pivot = pd.pivot_table(
-        df_top,
-        values="popularity",
-        index="genre_names",
-        columns="origin_country",
-        aggfunc="mean",
-    )
-    fig, ax = plt.subplots(figsize=(12, 6))
-    im = ax.imshow(pivot, aspect="auto")
-    ax.set_xticks(range(len(pivot.columns)))
-    ax.set_xticklabels(pivot.columns, rotation=45)
-    ax.set_yticks(range(len(pivot.index)))
-    ax.set_yticklabels(pivot.index)
-    plt.colorbar(im, label="Average Popularity")
-    ax.set_title("Average Genre Popularity by Country (Top 10 Countries)")
-    st.pyplot(fig)
+        st.write("### Average Genre Popularity by Country (Top 10 Countries)")
+        show_chart(
+            "country/genre_popularity",
+            pivot_imshow,
+            agg["pivot"],
+            "Average Genre Popularity by Country (Top 10 Countries)",
+            "Average Popularity",
+        )
 
 # ==============================
 # TRENDS OVER TIME
@@ -487,122 +892,81 @@ elif section == "Country Analysis":
 elif section == "Trends Over Time":
     st.title("📈 Trends Over Time")
 
-    trend_df = filtered_df.copy()
+    agg = section_aggregates(section, filter_key)
 
-    exploded = trend_df.explode("genre_names")
-    genre_trends = pd.pivot_table(
-        exploded,
-        values="popularity",
-        index="year",
-        columns="genre_names",
-        aggfunc="mean",
+    show_chart(
+        "trends/genre_trends",
+        frame_lines,
+        agg["genre_trends"],
+        "Genre Popularity Trends Over Time",
+        "Year",
+        "Popularity",
+        (10, 5),
     )
 
-    top_genres = exploded["genre_names"].value_counts().head(5).index
-    genre_trends = genre_trends[top_genres]
-
-    fig, ax = plt.subplots(figsize=(10, 5))
-    for g in genre_trends.columns:
-        ax.plot(genre_trends.index, genre_trends[g], label=g)
-
-    ax.set_title("Genre Popularity Trends Over Time")
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Popularity")
-    ax.legend()
-    st.pyplot(fig)
-
     # Additional plots
     st.write("### Number of TV Shows Released per Year")
-    trend_df["first_air_year"] = trend_df["first_air_date"].dt.year
-    shows_per_year = trend_df["first_air_year"].value_counts().sort_index()
-    fig, ax = plt.subplots()
-    ax.plot(shows_per_year.index, shows_per_year.values)
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Number of Shows")
-    ax.set_title("Number of TV Shows Released per Year")
-    st.pyplot(fig)
+    show_chart(
+        "trends/shows_per_year",
+        series_line,
+        agg["shows_per_year"],
+        "Number of TV Shows Released per Year",
+        "Year",
+        "Number of Shows",
+    )
 
     st.write("### Genre Preference Trends Over Time")
-    df_time = trend_df.dropna(subset=["year"])
-    df_time_genre = df_time.explode("genre_names")
-    genre_trends = pd.pivot_table(
-        df_time_genre,
-        values="popularity",
-        index="year",
-        columns="genre_names",
-        aggfunc="mean",
+    show_chart(
+        "trends/genre_preference",
+        frame_lines,
+        agg["genre_trends_top"],
+        "Genre Preference Trends Over Time",
+        "Year",
+        "Average Popularity",
+        (12, 6),
     )
-    top_genres = df_time_genre["genre_names"].value_counts().head(6).index
-    genre_trends_top = genre_trends[top_genres]
-    fig, ax = plt.subplots(figsize=(12, 6))
-    for genre in genre_trends_top.columns:
-        ax.plot(genre_trends_top.index, genre_trends_top[genre], label=genre)
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Average Popularity")
-    ax.set_title("Genre Preference Trends Over Time")
-    ax.legend()
-    st.pyplot(fig)
 
     st.write("### Normalized Genre Popularity Trends Over Time")
-    genre_trends_normalized = genre_trends_top / genre_trends_top.max()
-    fig, ax = plt.subplots(figsize=(12, 6))
-    for genre in genre_trends_normalized.columns:
-        ax.plot(genre_trends_normalized.index, genre_trends_normalized[genre], label=genre)
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Normalized Popularity")
-    ax.set_title("Normalized Genre Popularity Trends Over Time")
-    ax.legend()
-    st.pyplot(fig)
+    show_chart(
+        "trends/normalized",
+        frame_lines,
+        agg["genre_trends_normalized"],
+        "Normalized Genre Popularity Trends Over Time",
+        "Year",
+        "Normalized Popularity",
+        (12, 6),
+    )
 
     st.write("### Genre Popularity Trends by Decade for Each Age Group")
-    trend_df["decade"] = (trend_df["year"] // 10) * 10
-    if "age_group" not in trend_df.columns:
-        trend_df["age_group"] = pd.cut(
-            trend_df["user_age"],
-            bins=[0, 20, 40, 60, 100],
-            labels=["0-20", "21-40", "41-60", "61+"],
-        )
-    df_age_genre = trend_df.dropna(subset=["decade", "age_group"]).explode("genre_names")
-    pivot_decade = pd.pivot_table(
-        df_age_genre,
-        values="popularity",
-        index=["decade", "age_group"],
-        columns="genre_names",
-        aggfunc="mean",
-        observed=False,
-    ).reset_index()
-    top_genres = df_age_genre["genre_names"].value_counts().head(5).index
+    pivot_decade = agg["pivot_decade"]
+    top_genres = agg["decade_top_genres"]
     for age in pivot_decade["age_group"].dropna().unique():
-        df_plot = pivot_decade[pivot_decade["age_group"] == age]
-        fig, ax = plt.subplots(figsize=(10, 5))
-        for genre in top_genres:
-            if genre in df_plot.columns:
-                ax.plot(df_plot["decade"], df_plot[genre], marker="o", label=genre)
-        ax.set_title(f"Genre Popularity Trends by Decade ({age})")
-        ax.set_xlabel("Decade")
-        ax.set_ylabel("Average Popularity")
-        ax.legend()
-        ax.grid(alpha=0.3)
-        st.pyplot(fig)
+        show_chart(
+            f"trends/decade/{age}",
+            decade_trends_lines,
+            pivot_decade[pivot_decade["age_group"] == age],
+            top_genres,
+            age,
+        )
 
 # ==============================
 # ADDITIONAL ANALYSES
 # ==============================
 elif section == "Additional Analyses":
     st.title("🔍 Additional Analyses")
+    filtered_df = section_frame()
 
     st.write("### Outliers in Vote Average")
-    Q1 = filtered_df["vote_average"].quantile(0.25)
-    Q3 = filtered_df["vote_average"].quantile(0.75)
-    IQR = Q3 - Q1
-    mask = (filtered_df["vote_average"] < (Q1 - 1.5 * IQR)) | (
-        filtered_df["vote_average"] > (Q3 + 1.5 * IQR)
-    )
-    outliers = filtered_df.loc[mask, ["id", "name", "vote_average"]]
-    st.dataframe(outliers)
+    st.dataframe(vote_outliers(filter_key))
 
     st.write("### Missing Values Report")
-    missing_values = filtered_df.isnull().sum()
+    if filtered_df is not None:
+        missing_values = filtered_df.isnull().sum()
+    else:
+        missing_values = column_profile(filter_key)["missing"].rename(None)
     st.dataframe(missing_values)
 
     # Any other non-plot analyses can go here
+
+flush_charts()
+end_rerun()
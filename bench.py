@@ -0,0 +1,303 @@
+# ==============================
+# HEADLESS BENCHMARK – TV SHOW ANALYTICS
+# ==============================
+"""Rerun latency, peak memory and figure counts for app.py, without a browser.
+
+Drives the dashboard with Streamlit's AppTest through every section for a
+matrix of age ranges and genre selections, on the shipped CSV and on larger
+synthetic datasets learned from it (see synthetic.py). Each case is run twice: once cold (first visit of
+that section and filter state) and once warm (the same rerun again, served
+from the caches). Every dataset size runs in its own process so its peak
+RSS is its own.
+
+    python bench.py                          # 10k, 100k and 1M rows
+    python bench.py --rows 10000 --output bench.json
+    python bench.py --baseline bench.json    # exit 1 on a p95 regression
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from synthetic import fit, write_dataset as write_synthetic
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# app.py reads its data from this path, relative to the working directory.
+DATA_FILE = "10k_Poplar_Tv_Shows_with_users_updated6.csv"
+SECTIONS = [
+    "Overview",
+    "User Age Analysis",
+    "Genre Analysis",
+    "Binge Watching",
+    "Time of Day",
+    "Country Analysis",
+    "Trends Over Time",
+    "Additional Analyses",
+]
+# None leaves a filter at its default (all ages / all genres).
+AGE_RANGES = [None, (18, 30), (31, 50), (60, 70)]
+GENRE_SELECTIONS = [None, ["Drama"], ["Comedy", "Animation"]]
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+SEED = 42
+RUN_TIMEOUT = 900
+# A warm or cold p95 this many times the baseline's counts as a regression.
+TOLERANCE = 1.25
+
+
+# ==============================
+# DATASETS
+# ==============================
+def write_dataset(rows, path, seed=SEED):
+    """A synthetic CSV of `rows` rows learned from the shipped one, written
+    to path; the shipped file itself at its own size."""
+    source = os.path.join(HERE, DATA_FILE)
+    raw = pd.read_csv(source)
+    if rows == len(raw):
+        shutil.copyfile(source, path)
+        return
+    write_synthetic(fit(raw), rows, {"csv": path}, seed)
+
+
+# ==============================
+# RUNNING ONE DATASET SIZE
+# ==============================
+def _image_count(node):
+    children = getattr(node, "children", None) or {}
+    return (getattr(node, "type", None) == "image") + sum(
+        _image_count(child) for child in children.values()
+    )
+
+
+def _select_filters(at, age_range, genres):
+    slider = at.sidebar.slider(key="age_filter")
+    if age_range is None:
+        slider.set_value((slider.min, slider.max))
+    else:
+        slider.set_value((max(age_range[0], slider.min), min(age_range[1], slider.max)))
+    options = at.sidebar.multiselect(key="genre_filter").options
+    at.sidebar.multiselect(key="genre_filter").set_value(
+        [genre for genre in genres or [] if genre in options]
+    )
+
+
+class _OpenFigures(logging.Handler):
+    """Most figures left open after any chart, read from the chart spans
+    app.py logs on the "timing" logger. render_chart() counts them in the
+    process that drew the chart, which for a render pool is a worker."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.peak = 0
+
+    def emit(self, record):
+        spans = json.loads(record.getMessage())["spans"]
+        self.peak = max([self.peak] + [span.get("open_figures", 0) for span in spans])
+
+
+def _peak_worker_rss_kib():
+    """Largest peak RSS (VmHWM) among this process's live children, the
+    app's render workers; 0 when charts are drawn in-process.
+
+    Read while the pool is still up: RUSAGE_CHILDREN only covers children
+    that have exited and been waited for.
+    """
+    peak = 0
+    for child in multiprocessing.active_children():
+        try:
+            with open(f"/proc/{child.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+        except OSError:  # exited meanwhile, or no /proc
+            continue
+    return peak
+
+
+def _timed_run(at):
+    started = time.perf_counter()
+    at.run(timeout=RUN_TIMEOUT)
+    return time.perf_counter() - started
+
+
+def bench_dataset(rows, workdir):
+    """Latency samples and resource figures for one dataset size.
+
+    Runs in a fresh process whose working directory is workdir, so the
+    app's data file, snapshot cache and Streamlit caches are its own.
+    """
+    warnings.filterwarnings("ignore")
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    os.chdir(workdir)
+    sys.path.insert(0, HERE)
+    from streamlit.testing.v1 import AppTest
+
+    # Also keeps app.py from adding its own stderr handler.
+    figures = _OpenFigures()
+    timing_logger = logging.getLogger("timing")
+    timing_logger.addHandler(figures)
+    timing_logger.setLevel(logging.INFO)
+
+    at = AppTest.from_file(os.path.join(HERE, "app.py"), default_timeout=RUN_TIMEOUT)
+    startup = _timed_run(at)
+    streaming = not at.sidebar.slider
+
+    cases = []
+    for age_range in [None] if streaming else AGE_RANGES:
+        for genres in [None] if streaming else GENRE_SELECTIONS:
+            if not streaming:
+                _select_filters(at, age_range, genres)
+            for section in SECTIONS:
+                at.sidebar.radio[0].set_value(section)
+                cold = _timed_run(at)
+                warm = _timed_run(at)
+                cases.append({
+                    "section": section,
+                    "age_range": age_range,
+                    "genres": genres,
+                    "cold_s": cold,
+                    "warm_s": warm,
+                    "images": _image_count(at._tree),
+                    "errors": len(at.exception),
+                })
+
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers_kib = _peak_worker_rss_kib()
+    return {
+        "rows": rows,
+        "streaming": streaming,
+        "startup_s": startup,
+        "peak_rss_mib": peak_kib / 1024,
+        "peak_worker_rss_mib": workers_kib / 1024,
+        "open_figures": figures.peak,
+        "cases": cases,
+    }
+
+
+# ==============================
+# REPORTING
+# ==============================
+def _percentiles(values):
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+    }
+
+
+def summarize(result):
+    cases = pd.DataFrame(result["cases"])
+    by_section = {
+        section: {
+            "cold": _percentiles(group["cold_s"]),
+            "warm": _percentiles(group["warm_s"]),
+            "images": int(group["images"].max()),
+        }
+        for section, group in cases.groupby("section", sort=False)
+    }
+    return {
+        "rows": result["rows"],
+        "streaming": result["streaming"],
+        "startup_s": result["startup_s"],
+        "peak_rss_mib": result["peak_rss_mib"],
+        "peak_worker_rss_mib": result["peak_worker_rss_mib"],
+        "open_figures": result["open_figures"],
+        "errors": int(cases["errors"].sum()),
+        "images": int(cases["images"].sum()),
+        "cold": _percentiles(cases["cold_s"]),
+        "warm": _percentiles(cases["warm_s"]),
+        "sections": by_section,
+    }
+
+
+def print_summary(summary):
+    print(
+        f"\n{summary['rows']:,} rows"
+        f"{' (streamed)' if summary['streaming'] else ''}: "
+        f"startup {summary['startup_s']:.2f}s, "
+        f"peak RSS {summary['peak_rss_mib']:.0f} MiB "
+        f"(render workers {summary['peak_worker_rss_mib']:.0f} MiB), "
+        f"{summary['images']} images, {summary['open_figures']} figures left open, "
+        f"{summary['errors']} errors"
+    )
+    print(f"  {'section':<22}{'cold p50':>10}{'cold p95':>10}{'warm p50':>10}{'warm p95':>10}")
+    rows = list(summary["sections"].items()) + [("all", summary)]
+    for name, stats in rows:
+        print(
+            f"  {name:<22}"
+            f"{stats['cold']['p50']:>10.3f}{stats['cold']['p95']:>10.3f}"
+            f"{stats['warm']['p50']:>10.3f}{stats['warm']['p95']:>10.3f}"
+        )
+
+
+def regressions(summaries, baseline, tolerance):
+    """Messages for every p95 that grew past tolerance x the baseline's."""
+    found = []
+    previous = {entry["rows"]: entry for entry in baseline}
+    for summary in summaries:
+        before = previous.get(summary["rows"])
+        if before is None:
+            continue
+        for section, stats in summary["sections"].items():
+            for phase in ["cold", "warm"]:
+                old = before["sections"].get(section, {}).get(phase, {}).get("p95")
+                new = stats[phase]["p95"]
+                if old and new > old * tolerance:
+                    found.append(
+                        f"{summary['rows']:,} rows, {section}, {phase} p95: "
+                        f"{old:.3f}s -> {new:.3f}s"
+                    )
+        if summary["errors"] > before["errors"]:
+            found.append(f"{summary['rows']:,} rows: {summary['errors']} errors")
+        if summary["open_figures"] > before["open_figures"]:
+            found.append(f"{summary['rows']:,} rows: {summary['open_figures']} figures left open")
+    return found
+
+
+# ==============================
+# MAIN
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="write the summaries to this JSON file")
+    parser.add_argument("--baseline", help="JSON from an earlier --output to compare with")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    summaries = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory(prefix="tvshows-bench-") as workdir:
+            write_dataset(rows, os.path.join(workdir, DATA_FILE), args.seed)
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(bench_dataset, rows, workdir).result()
+        summary = summarize(result)
+        print_summary(summary)
+        summaries.append(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(summaries, json.load(f), args.tolerance)
+        for message in found:
+            print(f"REGRESSION {message}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
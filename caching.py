@@ -0,0 +1,139 @@
+# ==============================
+# IN-PROCESS CACHES – TV SHOW ANALYTICS
+# ==============================
+"""Size-bounded LRU cache shared by all sessions of one server process, and
+cache files built once and shared by every process."""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+
+def nbytes(value):
+    """Best-effort payload size: .nbytes for arrays, len() for bytes."""
+    if value is None:
+        return 0
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class ByteLRU:
+    """Thread-safe LRU mapping bounded by the total size of its values.
+
+    Streamlit serves sessions from several threads, so every access takes the
+    lock. A value larger than max_bytes on its own is returned but not kept.
+    """
+
+    def __init__(self, max_bytes, sizeof=nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def get_or_compute(self, key, compute):
+        # Computed outside the lock: two sessions racing on the same cold key
+        # both compute, which is cheaper than serialising every miss.
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+# ==============================
+# CACHE FILES
+# ==============================
+@contextmanager
+def _locked(lock_path):
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def build_once(path, build, lock_path):
+    """path, first created by build(partial_path) unless it exists.
+
+    build() writes a temporary name beside path, unique to this process,
+    which is moved into place whole, so a reader never sees half a file.
+    Processes building under the same lock_path take turns, so the second
+    finds the file the first built; without fcntl each builds its own copy
+    and the last one moved in wins.
+    """
+    if os.path.exists(path):
+        return path
+    with _locked(lock_path):
+        if not os.path.exists(path):
+            partial = f"{path}.{os.getpid()}.tmp"
+            try:
+                build(partial)
+                os.replace(partial, path)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+    return path
+
+
+def remove_stale(directory, prefix, suffix, keep):
+    """Delete the files in directory named prefix...suffix other than keep,
+    such as earlier builds of the same source. A file still open elsewhere
+    stays readable there on POSIX; one that cannot be removed is left."""
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix) and name != os.path.basename(keep):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,411 @@
+# ==============================
+# CHART RENDERING HELPERS – TV SHOW ANALYTICS
+# ==============================
+"""Turning matplotlib figures into the image bytes the dashboard serves.
+
+Every chart is a module-level function that takes plain data (Series,
+DataFrames, scalars) and returns a figure, so a chart can be rendered
+in-process or shipped to a worker process as (function, args).
+"""
+
+import io
+import logging
+import multiprocessing
+import threading
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from matplotlib.colors import to_rgba
+
+from timing import clock, elapsed
+
+logger = logging.getLogger(__name__)
+
+# Same settings st.pyplot uses, so cached images look like the live ones.
+PNG_DPI = 200
+
+# pyplot keeps one global figure registry and a "current figure" that calls
+# like plt.xticks() act on; Streamlit draws from one thread per session, so
+# drawing is serialized to keep those calls (and the cleanup below) exact.
+_PYPLOT_LOCK = threading.RLock()
+
+
+def figure_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=PNG_DPI, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def open_figure_count():
+    return len(plt.get_fignums())
+
+
+def render_figure(draw, name=None):
+    """Call draw(), encode the figure it returns and release it.
+
+    Every figure pyplot registered while draw() ran is closed afterwards,
+    including ones a plotting helper opened on the side or that were left
+    behind by an exception, so long-running servers hold none between reruns.
+    """
+    with _PYPLOT_LOCK:
+        before = set(plt.get_fignums())
+        try:
+            return figure_png(draw())
+        finally:
+            for num in set(plt.get_fignums()) - before:
+                plt.close(num)
+            logger.debug(
+                "rendered %s; %d matplotlib figures open",
+                name or getattr(draw, "__name__", "chart"),
+                open_figure_count(),
+            )
+
+
+# ==============================
+# RENDER POOL
+# ==============================
+# matplotlib holds the GIL while drawing, so threads do not overlap; a pool
+# of processes renders a section's charts side by side instead. Workers are
+# spawned (not forked from the threaded server) and only import this module.
+def _init_worker(theme):
+    matplotlib.use("Agg")
+    sns.set(style=theme)
+    warnings.filterwarnings("ignore")
+
+
+def start_render_pool(workers, theme):
+    """Process pool for render_chart(), or None to render in-process."""
+    if workers < 2:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(theme,),
+    )
+
+
+def render_chart(draw, args):
+    """(PNG bytes, elapsed() plus "open_figures") for draw(*args), measured
+    where it is drawn: figures left open in a render worker never show up in
+    the server process's registry."""
+    started = clock()
+    png = render_figure(lambda: draw(*args), name=draw.__name__)
+    return png, {**elapsed(started), "open_figures": open_figure_count()}
+
+
+def submit_chart(pool, draw, args):
+    """Future for render_chart(draw, args), from the pool or drawn inline."""
+    if pool is not None:
+        try:
+            return pool.submit(render_chart, draw, args)
+        except (BrokenProcessPool, RuntimeError):
+            logger.warning("render pool unavailable; drawing %s inline", draw.__name__)
+    future = Future()
+    try:
+        future.set_result(render_chart(draw, args))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def chart_result(future, draw, args):
+    # A worker that died takes the whole pool down with it; redraw inline
+    # rather than failing the page.
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        logger.warning("render pool broke; drawing %s inline", draw.__name__)
+        return render_chart(draw, args)
+
+
+# ==============================
+# SHARED CHART SHAPES
+# ==============================
+def note_rows(fig, text):
+    # Small corner caption saying how many rows a reduced plot stands for.
+    fig.text(0.99, 0.01, text, ha="right", va="bottom", fontsize=8, alpha=0.7)
+
+
+def series_line(series, title, xlabel, ylabel):
+    fig, ax = plt.subplots()
+    ax.plot(series.index, series.values)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return fig
+
+
+def frame_lines(frame, title, xlabel, ylabel, figsize):
+    fig, ax = plt.subplots(figsize=figsize)
+    for col in frame.columns:
+        ax.plot(frame.index, frame[col], label=col)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.legend()
+    return fig
+
+
+def pivot_heatmap(pivot, title, cmap, figsize):
+    fig, ax = plt.subplots(figsize=figsize)
+    sns.heatmap(pivot, cmap=cmap, ax=ax)
+    ax.set_title(title)
+    return fig
+
+
+def pivot_imshow(pivot, title, label):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    im = ax.imshow(pivot, aspect="auto")
+    ax.set_xticks(range(len(pivot.columns)))
+    ax.set_xticklabels(pivot.columns, rotation=45)
+    ax.set_yticks(range(len(pivot.index)))
+    ax.set_yticklabels(pivot.index)
+    plt.colorbar(im, label=label)
+    ax.set_title(title)
+    return fig
+
+
+# Density curves come precomputed from kde.binned_kde() as (support,
+# density) pairs, or None where there is nothing to draw, so charts never run
+# seaborn's own per-point KDE. Histograms likewise come binned, as the
+# (counts, edges) np.histogram() returns, so a chart never needs the rows.
+def overlay_density(ax, curve, edges):
+    """Draw a curve over the histogram on ax the way histplot(kde=True) does:
+    scaled to the bars' total area and limited to the data range."""
+    if curve is None or not ax.patches:
+        return
+    support, density = curve
+    inside = (support >= edges[0]) & (support <= edges[-1])
+    area = sum(bar.get_width() * bar.get_height() for bar in ax.patches)
+    color = to_rgba(ax.patches[0].get_facecolor(), 1)
+    ax.plot(support[inside], density[inside] * area, color=color)
+
+
+def diagonal_density(x, curves, color=None, label=None, **kwargs):
+    # PairGrid.map_diag() callback, drawn like sns.kdeplot(fill=True).
+    curve = curves.get(x.name)
+    if curve is None:
+        return
+    support, density = curve
+    area = plt.gca().fill_between(
+        support,
+        0,
+        density,
+        facecolor=to_rgba(color, 0.25),
+        edgecolor=to_rgba(color, 1),
+    )
+    area.sticky_edges.y[:] = (0, np.inf)
+
+
+# ==============================
+# OVERVIEW
+# ==============================
+def binned_hist(ax, histogram):
+    # The bars ax.hist() draws for the values, from their counts.
+    counts, edges = histogram
+    ax.hist(edges[:-1], bins=edges, weights=counts)
+
+
+def binned_histplot(ax, histogram, **kwargs):
+    # sns.histplot() of the values, from their counts. The edges go in as a
+    # list: seaborn compares bins against "auto" when given weights.
+    counts, edges = histogram
+    sns.histplot(x=edges[:-1], weights=counts, bins=list(edges), ax=ax, **kwargs)
+
+
+def popularity_hist(popularity):
+    fig, ax = plt.subplots()
+    binned_hist(ax, popularity)
+    ax.set_xlabel("Popularity Score")
+    ax.set_ylabel("Number of Shows")
+    ax.set_title("Histogram of Popularity Scores")
+    return fig
+
+
+def key_metric_distributions(popularity, vote_average, vote_count, curves):
+    # Histograms with bins="auto", as sns.histplot() picks them.
+    fig, axs = plt.subplots(1, 3, figsize=(15, 4))
+    # alpha=0.5 is what histplot(kde=True) gives the bars under a curve.
+    binned_histplot(axs[0], popularity, alpha=0.5)
+    overlay_density(axs[0], curves["popularity"], popularity[1])
+    axs[0].set_title("Distribution of Popularity")
+    binned_histplot(axs[1], vote_average, alpha=0.5)
+    overlay_density(axs[1], curves["vote_average"], vote_average[1])
+    axs[1].set_title("Distribution of Vote Average")
+    binned_histplot(axs[2], vote_count)
+    axs[2].set_yscale("log")
+    axs[2].set_title("Distribution of Vote Count (Log Scale)")
+    return fig
+
+
+def numeric_pairplot(pair_df, total_rows, curves):
+    # pair_df may be a sample (see aggregates.stratified_sample and the
+    # engines' query_sample()); total_rows is the size of the set it was
+    # drawn from. The diagonal densities in
+    # curves are always over the full set. Laid out as
+    # sns.pairplot(diag_kind="kde", corner=True) would.
+    grid = sns.PairGrid(pair_df, corner=True, diag_sharey=False)
+    grid.map_diag(diagonal_density, curves=curves)
+    grid.map_offdiag(sns.scatterplot)
+    grid.tight_layout()
+    if len(pair_df) < total_rows:
+        note_rows(
+            grid.figure,
+            f"Sample of {len(pair_df):,} of {total_rows:,} shows",
+        )
+    return grid.figure
+
+
+def numeric_corr_heatmap(corr):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr, annot=True, fmt=".2f", cmap="coolwarm", ax=ax)
+    ax.set_title("Correlation Heatmap of Numeric Features")
+    return fig
+
+
+# ==============================
+# USER AGE ANALYSIS
+# ==============================
+def age_hist(user_age):
+    fig, ax = plt.subplots()
+    binned_hist(ax, user_age)
+    ax.set_title("Histogram of User Ages")
+    ax.set_xlabel("Age")
+    ax.set_ylabel("Count")
+    return fig
+
+
+def vote_scatter(vote_average, vote_count, max_points, total_rows=None):
+    # Past max_points a scatter is mostly overdraw and its cost grows with
+    # every row; hexagonal bins (log-scaled counts) cost one pass instead.
+    # The values may also be a sample of total_rows rows.
+    fig, ax = plt.subplots()
+    if len(vote_average) > max_points:
+        hb = ax.hexbin(vote_average, vote_count, gridsize=40, bins="log", mincnt=1)
+        plt.colorbar(hb, label="Shows")
+        note_rows(fig, f"Binned: {len(vote_average):,} shows")
+    else:
+        ax.scatter(vote_average, vote_count)
+        if total_rows is not None and len(vote_average) < total_rows:
+            note_rows(fig, f"Sample of {len(vote_average):,} of {total_rows:,} shows")
+    ax.set_xlabel("Vote Average")
+    ax.set_ylabel("Vote Count")
+    ax.set_title("Vote Average vs Vote Count")
+    return fig
+
+
+def session_duration_by_age(age_duration):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(age_duration.index, age_duration.values)
+    ax.set_title("Average Viewing Session Duration per Age")
+    ax.set_xlabel("User Age")
+    ax.set_ylabel("Average Duration (min)")
+    ax.grid(True)
+    return fig
+
+
+def corr_imshow(corr):
+    fig, ax = plt.subplots()
+    im = ax.imshow(corr)
+    ax.set_xticks(range(len(corr.columns)))
+    ax.set_xticklabels(corr.columns, rotation=45)
+    ax.set_yticks(range(len(corr.index)))
+    ax.set_yticklabels(corr.index)
+    plt.colorbar(im)
+    ax.set_title("Correlation Heatmap of Numerical Features")
+    return fig
+
+
+# ==============================
+# GENRE ANALYSIS
+# ==============================
+def top_genres_bar(genre_counts):
+    fig, ax = plt.subplots()
+    genre_counts.plot(kind="bar", ax=ax)
+    ax.set_title("Top 10 Genres")
+    ax.set_xlabel("Genre")
+    ax.set_ylabel("Number of Shows")
+    plt.xticks(rotation=45)
+    return fig
+
+
+def liking_probability_heatmap(pivot_prob):
+    fig, ax = plt.subplots(figsize=(20, 15))
+    sns.heatmap(pivot_prob, cmap="YlGnBu", annot=False, linewidths=0.5, ax=ax)
+    ax.set_title("Genre Liking Probability by Age")
+    ax.set_xlabel("User Age")
+    ax.set_ylabel("Genre")
+    plt.xticks(rotation=45)
+    plt.yticks(rotation=0)
+    return fig
+
+
+# ==============================
+# BINGE WATCHING
+# ==============================
+def binge_genre_heatmap(pivot_binge):
+    fig, ax = plt.subplots(figsize=(12, 15))
+    sns.heatmap(pivot_binge, cmap="YlOrRd", annot=True, fmt=".2f", linewidths=0.5, ax=ax)
+    ax.set_title("Binge-Watching Probability by Age Group and Genre")
+    ax.set_xlabel("Age Group")
+    ax.set_ylabel("Genre")
+    plt.xticks(rotation=45)
+    plt.yticks(rotation=0)
+    return fig
+
+
+# ==============================
+# COUNTRY ANALYSIS
+# ==============================
+def top_countries_barh(top_countries):
+    fig, ax = plt.subplots()
+    top_countries.plot(kind="barh", ax=ax)
+    ax.set_title("Top 10 Countries by Number of Shows")
+    return fig
+
+
+def top_country_age_hist(top_country, top_country_ages):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    top_country_ages.hist(bins=20, ax=ax)
+    ax.set_title(f"Age Distribution for {top_country}")
+    ax.set_xlabel("Age")
+    ax.set_ylabel("Frequency")
+    ax.grid(True)
+    return fig
+
+
+def top_countries_count(top_countries):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.barplot(
+        x=top_countries.values,
+        y=top_countries.index,
+        order=top_countries.index,
+        errorbar=None,
+        ax=ax,
+    )
+    ax.set_title("Count of TV Shows by Origin Country (Top 10)")
+    ax.set_xlabel("Number of Shows")
+    ax.set_ylabel("Country")
+    return fig
+
+
+# ==============================
+# TRENDS OVER TIME
+# ==============================
+def decade_trends_lines(df_plot, top_genres, age):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for genre in top_genres:
+        if genre in df_plot.columns:
+            ax.plot(df_plot["decade"], df_plot[genre], marker="o", label=genre)
+    ax.set_title(f"Genre Popularity Trends by Decade ({age})")
+    ax.set_xlabel("Decade")
+    ax.set_ylabel("Average Popularity")
+    ax.legend()
+    ax.grid(alpha=0.3)
+    return fig
@@ -0,0 +1,137 @@
+# ==============================
+# CUBE EQUIVALENCE CHECK – TV SHOW ANALYTICS
+# ==============================
+"""Compares the section tables rolled up from the cube with the row-level
+definitions in aggregates.py, for a set of filter states.
+
+Includes filters where a table is degenerate (a top genre only on rows
+without a year, no row with an origin country), which is where the two
+have parted before.
+
+    python check_cube.py                 # the shipped CSV
+    python check_cube.py other.csv       # exit 1 on any mismatch
+"""
+
+import argparse
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from aggregates import SECTION_AGGREGATES
+from cube import build_cube, cube_state, finalize
+from data import (
+    genre_bitmask,
+    genre_bits,
+    genre_rows,
+    genre_vocabulary,
+    list_long_table,
+    load_dataset,
+)
+
+DATA_FILE = "10k_Poplar_Tv_Shows_with_users_updated6.csv"
+# (age range, genres); None leaves a filter off.
+FILTERS = [
+    (None, None),
+    ((18, 30), ["Drama"]),
+    ((31, 50), ["Comedy", "Animation"]),
+    # "News" ranks among the top genres here but only on rows without a year.
+    ((46, 47), ["Documentary"]),
+    ((60, 70), ["Western"]),
+]
+
+
+def _labels(index):
+    return [str(label) for label in index]
+
+
+def _same(expected, actual):
+    """Whether two tables hold the same values under the same labels.
+
+    Frames are compared by label, not row order: both sort rows by a mean,
+    and the order of tied rows is not part of the definition.
+    """
+    if isinstance(expected, pd.DataFrame):
+        expected = expected.set_axis(_labels(expected.columns), axis=1)
+        actual = actual.set_axis(_labels(actual.columns), axis=1)
+        expected = expected.set_axis(_labels(expected.index)).sort_index()
+        actual = actual.set_axis(_labels(actual.index)).sort_index()
+        if list(expected.columns) != list(actual.columns) or list(expected.index) != list(
+            actual.index
+        ):
+            return False
+        numeric = expected.select_dtypes("number").columns
+        return all(
+            (expected[col].astype(str) == actual[col].astype(str)).all()
+            for col in expected.columns.difference(numeric)
+        ) and np.allclose(
+            expected[numeric].to_numpy(float), actual[numeric].to_numpy(float), equal_nan=True
+        )
+    if isinstance(expected, pd.Series):
+        return _labels(expected.index) == _labels(actual.index) and np.allclose(
+            expected.to_numpy(float), actual.to_numpy(float), equal_nan=True
+        )
+    if isinstance(expected, pd.Index):
+        return _labels(expected) == _labels(actual)
+    return expected == actual
+
+
+def check(csv_path):
+    """Mismatches as (filter, section, table) triples; empty when the cube
+    agrees with the row-level tables everywhere."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        df, _ = load_dataset(csv_path, cache_dir)
+    genres = genre_vocabulary(df["genre_names"])
+    masks = genre_bitmask(df["genre_names"], genres)
+    long_tables = {
+        "genre_names": list_long_table(df["genre_names"], genres),
+        "origin_country": list_long_table(df["origin_country"]),
+    }
+    cube = build_cube(df, long_tables, masks)
+
+    mismatches = []
+    for age_range, selected in FILTERS:
+        known = [genre for genre in selected or [] if genre in genres]
+        if selected and not known:
+            continue
+        bits = genre_bits(known, genres)
+        rows = np.ones(len(df), dtype=bool)
+        if bits:
+            rows &= genre_rows(masks, bits)
+        if age_range is not None:
+            rows &= df["user_age"].between(*age_range).to_numpy()
+        if not rows.any():
+            continue
+        filtered_df = df[rows]
+        state = cube_state(cube, age_range, bits)
+
+        for section, tables in SECTION_AGGREGATES.items():
+            expected = tables(filtered_df, long_tables)
+            actual = finalize(state, section)
+            for name, table in expected.items():
+                if name == "top_country_ages":
+                    same = sorted(table) == sorted(actual[name])
+                else:
+                    same = _same(table, actual[name])
+                if not same:
+                    mismatches.append(((age_range, selected), section, name))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", nargs="?", default=DATA_FILE)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    mismatches = check(args.csv)
+    for filters, section, name in mismatches:
+        print(f"mismatch: {section} / {name} for {filters}")
+    print(f"{len(mismatches)} mismatches over {len(FILTERS)} filter states")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
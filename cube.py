@@ -0,0 +1,407 @@
+# ==============================
+# AGGREGATE CUBE – TV SHOW ANALYTICS
+# ==============================
+"""Pre-aggregated cells that every section's tables roll up from.
+
+Rows are grouped once into cuboids over genre_mask, user_age and the other
+dimensions the sections group by. Each cell holds a row count plus the sum,
+count and sum of squares of each measure, so means (and variances) roll up
+exactly. A filter state is then a slice of cells (genre bits and age range)
+and a section is a group-by over that slice, at a cost set by the number of
+distinct cells rather than the number of rows.
+
+cube_state() turns a slice into a partial state: a dict of Series of sums,
+counts and sizes keyed by group. States merge by addition (streaming.py
+merges one per chunk), and finalize() shapes one into the tables of a
+section.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import explode_lists
+from data import (
+    AGE_BAND_LABELS,
+    AGE_BANDS,
+    DERIVED_COLUMNS,
+    GENRE_AGE_BINS,
+    GENRE_AGE_LABELS,
+    genre_rows,
+)
+
+MEASURES = ["popularity", "vote_average", "binge_prob", "likes"]
+# likes: a rating above this counts as the user liking the show.
+LIKE_MIN_VOTE = 7
+
+# name -> (list columns exploded, dimensions, measures). A row lands in one
+# cell per item of each exploded list, so a cuboid is only ever rolled up
+# over its own dimensions, never summed across list items. Each cuboid has
+# only the dimensions its STATE_GROUPS need beyond the filter keys
+# (genre_mask, user_age): every extra one multiplies the cells, and a cuboid
+# over all of them has almost one cell per row.
+CUBOIDS = {
+    "rows": ([], ["genre_mask", "user_age"], ["popularity", "vote_average", "binge_prob"]),
+    "hour": ([], ["genre_mask", "user_age", "watch_hour"], []),
+    "year": ([], ["genre_mask", "user_age", "year"], []),
+    "genre": (
+        ["genre_names"],
+        ["genre_mask", "user_age", "genre_names"],
+        ["popularity", "binge_prob", "likes"],
+    ),
+    "genre_year": (
+        ["genre_names"],
+        ["genre_mask", "user_age", "year", "genre_names"],
+        ["popularity"],
+    ),
+    "country": (["origin_country"], ["genre_mask", "user_age", "origin_country"], []),
+    "genre_country": (
+        ["genre_names", "origin_country"],
+        ["genre_mask", "user_age", "genre_names", "origin_country"],
+        ["popularity"],
+    ),
+    # A quantile sketch: row counts per bucket (see SKETCH_BUCKETS).
+    "vote_average": ([], ["genre_mask", "user_age", "vote_average_bucket"], []),
+}
+
+# column -> buckets per unit of its quantile sketch. A value is counted at
+# the nearest multiple of 1 / buckets, so a (genre_mask, user_age) cell
+# holds at most range * buckets + 1 of them however many distinct values the
+# column has, and every quantile read back is within half a bucket width of
+# the exact one (rounding keeps the order of the values and moves each by
+# at most that). For vote_average (0-10) that is 101 buckets and 0.05.
+SKETCH_BUCKETS = {"vote_average": 10}
+
+# Every group in a partial state: name -> (cuboid, keys, measure). The
+# cuboid's cells are rolled up over keys; the query engines group the rows
+# exploded over that cuboid's list columns instead. A measure gives
+# {name}_sum and {name}_count, None the group's row count as {name}. Groups
+# with a missing key are left out, as groupby(observed=True) leaves them.
+# cube_state() and the query engines (duckdb_engine.py, polars_engine.py)
+# all build from this.
+STATE_GROUPS = {
+    "genre_count": ("genre", ["genre_names"], None),
+    "genre_age_popularity": ("genre", ["genre_names", "age_group"], "popularity"),
+    "likes": ("genre", ["user_age", "genre_names"], "likes"),
+    "age_binge": ("rows", ["user_age"], "binge_prob"),
+    "band_genre_binge": ("genre", ["age_band", "genre_names"], "binge_prob"),
+    "band_hour_count": ("hour", ["age_band", "watch_hour"], None),
+    "country_count": ("country", ["origin_country"], None),
+    "country_age_count": ("country", ["origin_country", "user_age"], None),
+    "pair_country_count": ("genre_country", ["origin_country"], None),
+    "genre_country_popularity": ("genre_country", ["genre_names", "origin_country"], "popularity"),
+    "year_genre_popularity": ("genre_year", ["year", "genre_names"], "popularity"),
+    "year_genre_count": ("genre_year", ["year", "genre_names"], None),
+    "first_air_year_count": ("year", ["year"], None),
+    "decade_popularity": ("genre_year", ["decade", "age_group", "genre_names"], "popularity"),
+    "decade_genre_count": ("genre_year", ["decade", "age_group", "genre_names"], None),
+}
+
+# Besides the row count, a partial state's totals hold the sum and count of
+# each of these.
+TOTAL_MEASURES = ["vote_average", "popularity"]
+
+# The derived age columns as (low, high, label) bins: a user_age in
+# (low, high] gets label and one outside every bin none, as pd.cut gives
+# them. The query engines build their columns from these.
+AGE_BINS = {
+    "age_group": list(zip(GENRE_AGE_BINS[:-1], GENRE_AGE_BINS[1:], GENRE_AGE_LABELS)),
+    "age_band": list(zip(AGE_BANDS[:-1], AGE_BANDS[1:], AGE_BAND_LABELS)),
+}
+
+
+# ==============================
+# BUILDING
+# ==============================
+def _cells(frame, dims, measures):
+    squares = frame[measures].pow(2).add_suffix("_sumsq")
+    grouped = pd.concat([frame[dims + measures], squares], axis=1).groupby(
+        dims, observed=True, dropna=False, sort=False
+    )
+    parts = [grouped.size().rename("rows")]
+    if measures:
+        # Left out for count-only cuboids: with no rows, the empty frames
+        # they give cannot be aligned with the sizes.
+        parts += [
+            grouped[measures].sum().add_suffix("_sum"),
+            grouped[measures].count().add_suffix("_count"),
+            grouped[list(squares.columns)].sum(),
+        ]
+    return pd.concat(parts, axis=1).reset_index()
+
+
+def build_cube(df, long_tables, masks=None):
+    """{cuboid name: cells} for df.
+
+    long_tables are the (row_id, value) tables for df's list columns and
+    masks its genre bitmask; without masks every cell has genre_mask 0 and
+    the cube can only be read unfiltered.
+    """
+    rows = df[[c for c in ["user_age", "year", "watch_hour"] + MEASURES if c in df.columns]]
+    rows = rows.assign(
+        likes=(df["vote_average"] > LIKE_MIN_VOTE).astype(float),
+        **{
+            f"{column}_bucket": (df[column] * buckets).round()
+            for column, buckets in SKETCH_BUCKETS.items()
+        },
+        genre_mask=np.zeros(len(df), dtype=np.uint64) if masks is None else masks,
+    )
+
+    cube = {}
+    for name, (lists, dims, measures) in CUBOIDS.items():
+        frame = explode_lists(rows, long_tables, lists, list(rows.columns)) if lists else rows
+        cube[name] = _cells(frame, dims, [m for m in measures if m in frame.columns])
+    return cube
+
+
+def merge_cubes(cube, other):
+    """One cube over the rows of both, e.g. a loaded frame and appended rows."""
+    merged = {}
+    for name, (_, dims, _) in CUBOIDS.items():
+        cells = pd.concat([cube[name], other[name]], ignore_index=True)
+        merged[name] = (
+            cells.groupby(dims, observed=True, dropna=False, sort=False).sum().reset_index()
+        )
+    return merged
+
+
+# ==============================
+# SLICING AND ROLLING UP
+# ==============================
+def _select(cells, age_range, bits):
+    keep = np.ones(len(cells), dtype=bool)
+    if bits:
+        keep &= genre_rows(cells["genre_mask"].to_numpy(), bits)
+    if age_range is not None:
+        ages = cells["user_age"].to_numpy()
+        keep &= (ages >= age_range[0]) & (ages <= age_range[1])
+    return cells[keep]
+
+
+def _slice(cells, age_range, bits):
+    cells = _select(cells, age_range, bits)
+    # The same definitions the row-level columns come from.
+    derived = ["age_group", "age_band"] + (["decade"] if "year" in cells.columns else [])
+    return cells.assign(**{name: DERIVED_COLUMNS[name][0] for name in derived})
+
+
+def _plain(series):
+    """series with categorical index levels turned into plain values.
+
+    Each chunk builds its own categories, so states only line up when added
+    if the keys are the values themselves.
+    """
+    index = series.index
+    levels = [index.get_level_values(i) for i in range(index.nlevels)]
+    levels = [
+        level.astype(object) if isinstance(level.dtype, pd.CategoricalDtype) else level
+        for level in levels
+    ]
+    series.index = pd.MultiIndex.from_arrays(levels) if len(levels) > 1 else levels[0]
+    return series
+
+
+def _grouped(cells, keys):
+    return cells.groupby(keys if len(keys) > 1 else keys[0], observed=True)
+
+
+def _sums(cells, keys, name, measure):
+    grouped = _grouped(cells, keys)
+    return {
+        f"{name}_sum": _plain(grouped[f"{measure}_sum"].sum()),
+        f"{name}_count": _plain(grouped[f"{measure}_count"].sum()),
+    }
+
+
+def _rows(cells, keys):
+    return _plain(_grouped(cells, keys)["rows"].sum())
+
+
+def cube_state(cube, age_range=None, bits=0):
+    """Partial state for the rows matching a filter: rows listing any genre
+    in bits, with user_age within age_range (both ends included)."""
+    cells = {
+        name: _slice(cube[name], age_range, bits)
+        for name in {cuboid for cuboid, _, _ in STATE_GROUPS.values()} | {"rows"}
+    }
+    rows = cells["rows"]
+
+    totals = {"rows": rows["rows"].sum()}
+    for measure in TOTAL_MEASURES:
+        totals[f"{measure}_sum"] = rows[f"{measure}_sum"].sum()
+        totals[f"{measure}_count"] = rows[f"{measure}_count"].sum()
+
+    state = {"totals": pd.Series(totals, dtype=float)}
+    for name, (cuboid, keys, measure) in STATE_GROUPS.items():
+        if measure is None:
+            state[name] = _rows(cells[cuboid], keys)
+        else:
+            state.update(_sums(cells[cuboid], keys, name, measure))
+    return state
+
+
+def engine_state(totals, frames):
+    """Partial state from a query engine's results.
+
+    totals maps the names in a state's totals to values. frames holds one
+    frame per STATE_GROUPS entry, in order, with the group's keys as
+    columns plus value_sum and value_count for a measure, or value (the row
+    count) without one.
+    """
+    state = {"totals": pd.Series(totals, dtype=float)}
+    for (name, (_, keys, measure)), frame in zip(STATE_GROUPS.items(), frames):
+        frame = frame.set_index(keys if len(keys) > 1 else keys[0])
+        if measure:
+            state[f"{name}_sum"] = frame["value_sum"].astype(float)
+            state[f"{name}_count"] = frame["value_count"]
+        else:
+            state[name] = frame["value"]
+    return state
+
+
+def cube_quantiles(cube, column, quantiles, age_range=None, bits=0):
+    """Series.quantile(quantiles) of column over the rows matching a filter,
+    to within half a bucket width of the column's sketch.
+
+    Read from the column's bucket counts, interpolating linearly between the
+    two order statistics around each position as pandas does. NaN where no
+    row has a value.
+    """
+    bucket = f"{column}_bucket"
+    counts = _select(cube[column], age_range, bits).groupby(bucket)["rows"].sum()
+    counts = counts[counts > 0]
+    if counts.empty:
+        return [np.nan] * len(quantiles)
+
+    # Dividing gives the decimals exactly, e.g. 6.8 rather than 6.800000000000001.
+    values = counts.index.to_numpy(dtype=float) / SKETCH_BUCKETS[column]
+    ends = np.cumsum(counts.to_numpy())
+    result = []
+    for q in quantiles:
+        position = q * (ends[-1] - 1)
+        below = int(np.floor(position))
+        pair = values[np.searchsorted(ends, [below, below + 1], side="right").clip(max=len(values) - 1)]
+        result.append(float(np.quantile(pair, position - below)))
+    return result
+
+
+# ==============================
+# FINAL TABLES
+# ==============================
+def _mean(state, name):
+    # Groups whose values were all missing have count 0 and come out NaN,
+    # as a groupby mean would give.
+    return state[f"{name}_sum"] / state[f"{name}_count"]
+
+
+def _top(counts, n):
+    counts = counts[counts > 0].astype(np.int64)
+    return counts.sort_values(ascending=False, kind="stable").head(n)
+
+
+def _ordered_columns(frame, labels):
+    return frame[[label for label in labels if label in frame.columns]]
+
+
+def _by_row_mean(frame):
+    return frame.loc[frame.mean(axis=1).sort_values(ascending=False).index]
+
+
+def _overview_tables(state):
+    totals = state["totals"]
+    return {
+        "rows": int(totals["rows"]),
+        "vote_average": totals["vote_average_sum"] / totals["vote_average_count"],
+        "popularity": totals["popularity_sum"] / totals["popularity_count"],
+    }
+
+
+def _genre_tables(state):
+    pivot = _mean(state, "genre_age_popularity").unstack("age_group").dropna(how="all")
+    return {
+        "genre_counts": _top(state["genre_count"], 10),
+        "pivot": _ordered_columns(pivot, GENRE_AGE_LABELS),
+        "pivot_prob": _by_row_mean(_mean(state, "likes").unstack("user_age").fillna(0)),
+    }
+
+
+def _binge_tables(state):
+    pivot_binge = _ordered_columns(
+        _mean(state, "band_genre_binge").unstack("age_band").fillna(0), AGE_BAND_LABELS
+    )
+    return {
+        "binge_by_age": _mean(state, "age_binge"),
+        "pivot_binge": _by_row_mean(pivot_binge),
+    }
+
+
+def _time_of_day_tables(state):
+    hours = state["band_hour_count"].astype(np.int64).unstack("watch_hour", fill_value=0)
+    return {"pivot": hours.reindex([band for band in AGE_BAND_LABELS if band in hours.index])}
+
+
+def _country_tables(state):
+    country_ages = state["country_age_count"].astype(np.int64)
+    # None (and no ages) when no row has an origin country.
+    top = _top(country_ages.groupby(level="origin_country").sum(), 1).index
+    top_country = top[0] if len(top) else None
+    ages = (
+        country_ages.xs(top_country, level="origin_country")
+        if top_country is not None
+        else pd.Series(dtype=np.int64)
+    )
+    top_pair_countries = _top(state["pair_country_count"], 10).index
+    genre_country = _mean(state, "genre_country_popularity")
+    genre_country = genre_country[
+        genre_country.index.get_level_values("origin_country").isin(top_pair_countries)
+    ]
+    return {
+        "top_countries": _top(state["country_count"], 10),
+        "top_country": top_country,
+        "top_country_ages": pd.Series(
+            np.repeat(ages.index.to_numpy(), ages.to_numpy()), name="user_age"
+        ),
+        "pivot": genre_country.unstack("origin_country").dropna(how="all").sort_index(axis=1),
+    }
+
+
+def _trends_tables(state):
+    year_genre = _mean(state, "year_genre_popularity").unstack("genre_names")
+    year_genre_counts = state["year_genre_count"].groupby(level="genre_names").sum()
+    genre_trends_top = _ordered_columns(year_genre, _top(year_genre_counts, 6).index)
+
+    pivot_decade = _mean(state, "decade_popularity").unstack("genre_names").reset_index()
+    pivot_decade["age_group"] = pd.Categorical(
+        pivot_decade["age_group"], categories=GENRE_AGE_LABELS, ordered=True
+    )
+    pivot_decade = pivot_decade.sort_values(["decade", "age_group"], ignore_index=True)
+    decade_counts = state["decade_genre_count"].groupby(level="genre_names").sum()
+    return {
+        # A top genre may appear only on rows without a year.
+        "genre_trends": _ordered_columns(year_genre, _top(state["genre_count"], 5).index),
+        "shows_per_year": state["first_air_year_count"].astype(np.int64).sort_index(),
+        "genre_trends_top": genre_trends_top,
+        "genre_trends_normalized": genre_trends_top / genre_trends_top.max(),
+        "pivot_decade": pivot_decade,
+        "decade_top_genres": _top(decade_counts, 5).index,
+    }
+
+
+# section -> its tables from a partial state. "Overview" holds the row
+# count and metric means.
+SECTION_TABLES = {
+    "Overview": _overview_tables,
+    "Genre Analysis": _genre_tables,
+    "Binge Watching": _binge_tables,
+    "Time of Day": _time_of_day_tables,
+    "Country Analysis": _country_tables,
+    "Trends Over Time": _trends_tables,
+}
+
+
+def finalize(state, section):
+    """The tables section draws, from a partial state.
+
+    Only that section's tables are built, so one that cannot be drawn for a
+    filter state leaves the others alone.
+    """
+    return SECTION_TABLES[section](state)
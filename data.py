@@ -0,0 +1,663 @@
+# ==============================
+# DATA LOADING HELPERS – TV SHOW ANALYTICS
+# ==============================
+"""CSV parsing and the on-disk columnar snapshot used by app.load_data()."""
+
+import ast
+import hashlib
+import io
+import os
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+LIST_COLUMNS = ["genre_names", "origin_country"]
+
+# Low-cardinality text columns stored as pandas Categoricals: one small code
+# per row plus a shared dictionary instead of a string per row. ("adult" is
+# already a one-byte bool and stays that way.)
+CATEGORICAL_COLUMNS = ["original_language", "user_category"]
+
+# Bump whenever parse_csv() changes the shape or dtypes of what it returns,
+# so snapshots written by an older version are rebuilt instead of reused.
+SNAPSHOT_VERSION = "4"
+
+
+# ==============================
+# LIST COLUMNS
+# ==============================
+# One item of a stored list literal, in either quote style, with its escapes
+# (such as the \' in 'Children\'s'); the query engines extract the same
+# items with it.
+LIST_ITEM_PATTERN = r"'(?:[^'\\]|\\.)*'" r'|"(?:[^"\\]|\\.)*"'
+
+# Rows are joined with NUL before scanning; the quoted-item patterns exclude
+# it, so a match can never run across two rows and each NUL token marks a
+# row boundary.
+_ROW_SEP = "\x00"
+_LIST_TOKEN = re.compile(
+    r"\x00"
+    r"|'(?:[^'\\\x00]|\\.)*'"
+    r'|"(?:[^"\\\x00]|\\.)*"'
+)
+
+
+def parse_list_column(texts):
+    """Parse a column of Python list literals such as "['US', 'GB']".
+
+    The whole column is scanned as one buffer with a single regex instead of
+    running ast.literal_eval per row. Returns (offsets, values, valid): row i
+    holds values[offsets[i]:offsets[i + 1]], values is an Arrow string array
+    and valid is False for rows that were missing (NaN) in the source.
+    """
+    texts = pd.Series(texts)
+    valid = texts.notna().to_numpy()
+    n = len(texts)
+
+    buffer = _ROW_SEP.join(texts.where(valid, "").astype(str).tolist())
+    tokens = pa.array(_LIST_TOKEN.findall(buffer), type=pa.large_string())
+
+    is_sep = pc.equal(tokens, _ROW_SEP)
+    items = tokens.filter(pc.invert(is_sep))
+    values = pc.utf8_slice_codeunits(items, 1, -1)
+
+    # Escapes are rare in these columns; only those items pay for literal_eval.
+    escaped = pc.match_substring(items, "\\").to_numpy(zero_copy_only=False)
+    if escaped.any():
+        values = values.to_numpy(zero_copy_only=False)
+        values[escaped] = [
+            ast.literal_eval(tok) for tok in items.filter(escaped).to_pylist()
+        ]
+        values = pa.array(values, type=pa.large_string())
+
+    is_sep = is_sep.to_numpy(zero_copy_only=False)
+    row_of_item = np.cumsum(is_sep)[~is_sep]
+    counts = np.bincount(row_of_item, minlength=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return offsets, values, valid
+
+
+def to_list_series(offsets, values, valid=None, index=None):
+    """Wrap offsets/values as an Arrow-backed list column (no per-row lists)."""
+    mask = None if valid is None else pa.array(~np.asarray(valid))
+    arr = pa.LargeListArray.from_arrays(
+        pa.array(offsets, type=pa.int64()),
+        pa.array(values, type=pa.large_string()),
+        mask=mask,
+    )
+    return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=index)
+
+
+def list_offsets_values(series):
+    """Inverse of to_list_series: (offsets, values) for an Arrow list column.
+
+    Works on slices too: offsets are rebased to start at 0 and missing rows
+    come back as empty.
+    """
+    arr = pa.array(series)
+    lengths = pc.fill_null(pc.list_value_length(arr), 0).to_numpy()
+    offsets = np.zeros(len(arr) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets, pc.list_flatten(arr)
+
+
+# ==============================
+# GENRE BITMASK
+# ==============================
+def genre_vocabulary(series):
+    return sorted(pc.unique(pc.list_flatten(pa.array(series))).drop_null().to_pylist())
+
+
+def genre_bitmask(series, vocabulary):
+    """One mask per row with bit i set when the row lists vocabulary[i].
+
+    A uint64 array for up to 64 genres; past that, an object array of Python
+    ints, which takes the same operators (see genre_rows()) at object speed
+    rather than failing.
+    """
+    offsets, values = list_offsets_values(series)
+    codes = pc.index_in(values, value_set=pa.array(vocabulary, type=values.type))
+    codes = pc.fill_null(codes, -1).to_numpy()
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    known = codes >= 0
+
+    if len(vocabulary) > 64:
+        masks = np.zeros(len(offsets) - 1, dtype=object)
+        np.bitwise_or.at(masks, rows[known], [1 << code for code in codes[known].tolist()])
+        return masks
+    masks = np.zeros(len(offsets) - 1, dtype=np.uint64)
+    np.bitwise_or.at(
+        masks, rows[known], np.left_shift(np.uint64(1), codes[known].astype(np.uint64))
+    )
+    return masks
+
+
+def genre_bits(selected, vocabulary):
+    bits = 0
+    for genre in selected:
+        bits |= 1 << vocabulary.index(genre)
+    return bits
+
+
+def genre_rows(masks, bits):
+    """Boolean array: which of genre_bitmask()'s masks share a bit with bits."""
+    if masks.dtype == object:
+        return (masks & bits).astype(bool)
+    return (masks & np.uint64(bits)) != 0
+
+
+# ==============================
+# LONG (ROW, VALUE) TABLES
+# ==============================
+def list_long_table(series, vocabulary=None):
+    """Normalize a list column into one (row_id, value) row per list item.
+
+    row_id is the frame's index label and value a Categorical over
+    vocabulary (sorted distinct values by default), so the table stores one
+    small integer code per item. Rows with empty lists contribute nothing.
+    """
+    offsets, values = list_offsets_values(series)
+    if vocabulary is None:
+        vocabulary = sorted(pc.unique(values).drop_null().to_pylist())
+
+    codes = pc.index_in(values, value_set=pa.array(vocabulary, type=values.type))
+    codes = pc.fill_null(codes, -1).to_numpy()
+    rows = np.repeat(np.arange(len(series)), np.diff(offsets))
+
+    return pd.DataFrame({
+        "row_id": series.index.to_numpy()[rows],
+        series.name: pd.Categorical.from_codes(codes, categories=vocabulary),
+    })
+
+
+def append_long_table(table, tail_table):
+    """Long table for a frame's rows followed by the table for rows appended
+    to it (whose row_ids already continue the frame's)."""
+    return append_rows(table, tail_table).reset_index(drop=True)
+
+
+# ==============================
+# SORTED VALUE INDEX
+# ==============================
+def sorted_index(series):
+    """(sorted values, their row positions) for the non-missing values, so
+    the rows beyond a bound are found by binary search."""
+    values = series.to_numpy(dtype=float)
+    order = np.argsort(values, kind="stable")[: np.count_nonzero(~np.isnan(values))]
+    index = (values[order], order)
+    for array in index:
+        array.setflags(write=False)
+    return index
+
+
+def extend_sorted_index(index, tail, first_row):
+    """sorted_index() of a column after tail's values were appended to it as
+    rows first_row, first_row + 1, ...
+
+    Only the tail is sorted; it is merged into the index by binary search,
+    after the equal values already there, as a stable sort of the whole
+    column would order them.
+    """
+    tail_values, tail_order = sorted_index(tail)
+    if not len(tail_values):
+        return index
+    values, order = index
+    at = np.searchsorted(values, tail_values, side="right")
+    index = (np.insert(values, at, tail_values), np.insert(order, at, tail_order + first_row))
+    for array in index:
+        array.setflags(write=False)
+    return index
+
+
+def rows_within(index, lo, hi, limit=None):
+    """Row positions, ascending, whose value is between lo and hi (both
+    included): one contiguous slice of the index.
+
+    None when more than limit rows match, where sorting their positions
+    would cost more than a scan of the column.
+    """
+    values, order = index
+    start = np.searchsorted(values, lo, side="left")
+    stop = np.searchsorted(values, hi, side="right")
+    if limit is not None and stop - start > limit:
+        return None
+    return np.sort(order[start:stop])
+
+
+def rows_outside(index, lo, hi):
+    """Row positions, ascending, whose value is below lo or above hi."""
+    values, order = index
+    if np.isnan(lo) or np.isnan(hi):
+        return np.empty(0, dtype=order.dtype)
+    below = order[: np.searchsorted(values, lo, side="left")]
+    above = order[np.searchsorted(values, hi, side="right"):]
+    return np.sort(np.concatenate([below, above]))
+
+
+# ==============================
+# DERIVED COLUMNS
+# ==============================
+GENRE_AGE_BINS = [12, 17, 24, 34, 44, 54, 70]
+GENRE_AGE_LABELS = [
+    "Teen (13–17)",
+    "Young Adult (18–24)",
+    "Adult (25–34)",
+    "Mid Adult (35–44)",
+    "Older Adult (45–54)",
+    "Senior (55–70)",
+]
+
+AGE_BANDS = [0, 20, 40, 60, 100]
+AGE_BAND_LABELS = ["0-20", "21-40", "41-60", "61+"]
+
+# A show counts as binge-watched above both of these.
+BINGE_MIN_POPULARITY = 50
+BINGE_MIN_VOTES = 1000
+
+WATCH_HOUR_SEED = 42
+
+
+def simulate_watch_hours(ages, seed=WATCH_HOUR_SEED):
+    """Draw a simulated viewing hour per user age, all in one batch.
+
+    Hours are Normal(mean, 2) truncated to an int and wrapped to 0-23, with
+    mean 21 under 20 years old, 20 under 40 and 19 otherwise. A dedicated
+    Generator keeps the draw reproducible without touching global RNG state.
+    """
+    ages = np.asarray(ages)
+    means = np.select([ages < 20, ages < 40], [21, 20], default=19)
+    rng = np.random.default_rng(seed)
+    return rng.normal(means, 2).astype(int) % 24
+
+
+def _watch_hour_seed(df):
+    # Rows parsed on their own (appended rows, see read_appended_rows) start
+    # past 0; seeding on the first row keeps their draw from repeating the
+    # draw for the rows at the top of the file.
+    first = int(df.index[0]) if len(df) else 0
+    return WATCH_HOUR_SEED if first == 0 else [WATCH_HOUR_SEED, first]
+
+
+def _is_hour(stored):
+    return bool(stored.notna().all() and stored.between(0, 23).all())
+
+
+# Every feature the dashboard derives from the raw columns, declared once in
+# dependency order as name -> (compute(df), check). With check=None a stored
+# column must equal compute(df); simulated features cannot be recomputed
+# exactly, so their check only asks whether the stored values are plausible.
+DERIVED_COLUMNS = {
+    "year": (lambda df: df["first_air_date"].dt.year, None),
+    "first_air_year": (lambda df: df["first_air_date"].dt.year, None),
+    "decade": (lambda df: (df["year"] // 10) * 10, None),
+    "age_group": (
+        lambda df: pd.cut(df["user_age"], bins=GENRE_AGE_BINS, labels=GENRE_AGE_LABELS),
+        None,
+    ),
+    "age_band": (
+        lambda df: pd.cut(df["user_age"], bins=AGE_BANDS, labels=AGE_BAND_LABELS),
+        None,
+    ),
+    "is_binge": (
+        lambda df: (df["popularity"] > BINGE_MIN_POPULARITY)
+        & (df["vote_count"] > BINGE_MIN_VOTES),
+        None,
+    ),
+    "binge_prob": (
+        lambda df: df["is_binge"].astype(int) * (1 - df["user_age"] / 100),
+        None,
+    ),
+    "watch_hour": (
+        lambda df: simulate_watch_hours(df["user_age"], _watch_hour_seed(df)),
+        _is_hour,
+    ),
+}
+
+
+def _same_values(stored, computed):
+    stored = pd.Series(stored)
+    computed = pd.Series(computed, index=stored.index)
+    if pd.api.types.is_numeric_dtype(stored) and pd.api.types.is_numeric_dtype(computed):
+        return bool(np.allclose(
+            stored.to_numpy(dtype=float), computed.to_numpy(dtype=float), equal_nan=True
+        ))
+    both_missing = stored.isna() & computed.isna()
+    return bool((both_missing | (stored.astype(str) == computed.astype(str))).all())
+
+
+def add_derived_columns(df):
+    """Fill in DERIVED_COLUMNS, reusing stored columns that pass their check.
+
+    Missing columns are computed; stored ones that disagree with their
+    definition are recomputed with a warning. Exact features are normalized
+    to the computed dtype (e.g. age_group as an age-ordered Categorical).
+    """
+    for name, (compute, check) in DERIVED_COLUMNS.items():
+        if name in df.columns and check is not None and check(df[name]):
+            continue
+
+        computed = compute(df)
+        if name in df.columns and (check is not None or not _same_values(df[name], computed)):
+            warnings.warn(f"Stored column {name!r} is stale; recomputing it")
+        df[name] = computed
+
+    return df
+
+
+# ==============================
+# CSV PARSING
+# ==============================
+def prepare_frame(df):
+    """Types and derived columns for rows just read from the CSV."""
+    for col in LIST_COLUMNS:
+        offsets, values, valid = parse_list_column(df[col])
+        df[col] = to_list_series(offsets, values, valid, index=df.index)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    df["first_air_date"] = pd.to_datetime(df["first_air_date"], errors="coerce")
+
+    return add_derived_columns(df)
+
+
+def parse_csv(path, first_row=0):
+    # first_row numbers the rows when path holds only part of the file.
+    df = pd.read_csv(path)
+    if first_row:
+        df.index = pd.RangeIndex(first_row, first_row + len(df))
+    return prepare_frame(df)
+
+
+def iter_csv_chunks(path, chunk_rows):
+    """prepare_frame()d chunks of at most chunk_rows rows, read lazily.
+
+    Chunks are numbered by their row in the file, like parse_csv(), so only
+    one chunk's worth of rows is ever held in memory.
+    """
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield prepare_frame(chunk)
+
+
+# ==============================
+# COLUMNAR SNAPSHOT
+# ==============================
+def snapshot_path_for(csv_path, cache_dir):
+    return os.path.join(cache_dir, os.path.basename(csv_path) + ".arrow")
+
+
+def file_sha256(path, limit=None, chunk_size=1 << 20):
+    """Hex SHA-256 of the file, or of its first `limit` bytes."""
+    digest = hashlib.sha256()
+    remaining = float("inf") if limit is None else limit
+    with open(path, "rb") as fh:
+        while remaining > 0:
+            chunk = fh.read(int(min(chunk_size, remaining)))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _source_metadata(csv_path, size=None):
+    # size: how much of the file the frame was parsed from, when not all.
+    stat = os.stat(csv_path)
+    return {
+        "snapshot_version": SNAPSHOT_VERSION,
+        "source_mtime_ns": str(stat.st_mtime_ns),
+        "source_size": str(stat.st_size if size is None else size),
+        "source_sha256": file_sha256(csv_path, limit=size),
+    }
+
+
+def _is_fresh(meta, csv_path):
+    """Check a snapshot's stored fingerprint against the CSV on disk.
+
+    mtime and size are compared first so the common case never reads the
+    CSV; if the mtime moved (fresh checkout, copied volume) the content hash
+    decides.
+    """
+    if meta.get("snapshot_version") != SNAPSHOT_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if meta.get("source_size") != str(stat.st_size):
+        return False
+    if meta.get("source_mtime_ns") == str(stat.st_mtime_ns):
+        return True
+    return meta.get("source_sha256") == file_sha256(csv_path)
+
+
+def _arrow_list_types(arrow_type):
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def read_snapshot(snapshot_path):
+    """Return (df, metadata) for a snapshot this version can read, or None.
+
+    Whether it still matches its CSV is for the caller to decide (see
+    _is_fresh() and appended_offset()).
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+
+    try:
+        with pa.memory_map(snapshot_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            meta = {
+                k.decode(): v.decode()
+                for k, v in (reader.schema.metadata or {}).items()
+            }
+            if meta.get("snapshot_version") != SNAPSHOT_VERSION:
+                return None
+
+            table = reader.read_all()
+            # Keep list columns Arrow-backed (offsets + values) rather than
+            # letting to_pandas() expand them into per-row numpy arrays.
+            df = table.to_pandas(types_mapper=_arrow_list_types)
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    return df, meta
+
+
+def write_snapshot(df, snapshot_path, meta):
+    """Persist df as an uncompressed Arrow IPC file next to its fingerprint.
+
+    Failures (read-only volume, unserialisable column) only warn: the
+    snapshot is an accelerator, never a requirement.
+    """
+    tmp_path = None
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata(meta)
+
+        os.makedirs(os.path.dirname(snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, snapshot_path)
+    except (OSError, pa.ArrowException) as exc:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        warnings.warn(f"Could not write data snapshot {snapshot_path}: {exc}")
+
+
+# ==============================
+# APPENDED ROWS
+# ==============================
+# The CSV is regenerated by appending rows to yesterday's file. When the
+# bytes a frame was parsed from are still an exact prefix of the file, only
+# the bytes after them are parsed and the new rows are added to the frame.
+def appended_offset(csv_path, meta):
+    """Byte offset where rows appended since meta was recorded begin.
+
+    None unless the file grew, the recorded size ends on a line break and
+    the first source_size bytes still hash to source_sha256.
+    """
+    try:
+        old_size = int(meta["source_size"])
+    except (KeyError, ValueError):
+        return None
+    if old_size <= 0 or os.stat(csv_path).st_size <= old_size:
+        return None
+
+    with open(csv_path, "rb") as fh:
+        fh.seek(old_size - 1)
+        if fh.read(1) != b"\n":
+            return None
+    if file_sha256(csv_path, limit=old_size) != meta.get("source_sha256"):
+        return None
+    return old_size
+
+
+def read_appended_rows(csv_path, offset, end, first_row):
+    """Parse the whole lines in bytes offset..end of csv_path as rows
+    first_row, first_row + 1, ...
+
+    Returns (rows, offset just past the last line parsed), or None when no
+    line is complete yet. A row the writer is still in the middle of has
+    no line break yet and is left for a later call.
+    """
+    with open(csv_path, "rb") as fh:
+        header = fh.readline()
+        fh.seek(offset)
+        body = fh.read(end - offset)
+    body = body[: body.rfind(b"\n") + 1]
+    if not body:
+        return None
+    return parse_csv(io.BytesIO(header + body), first_row=first_row), offset + len(body)
+
+
+def append_rows(df, tail):
+    """df followed by tail, with the dtypes one parse of both would give.
+
+    Categoricals whose categories differ are widened to the sorted union of
+    both first, otherwise concat would fall back to object columns. Neither
+    input is modified.
+    """
+    if tail.empty:
+        return df
+
+    widened = {}
+    for col in df.columns:
+        head_dtype, tail_dtype = df[col].dtype, tail[col].dtype
+        if (
+            isinstance(head_dtype, pd.CategoricalDtype)
+            and isinstance(tail_dtype, pd.CategoricalDtype)
+            and not head_dtype.categories.equals(tail_dtype.categories)
+        ):
+            widened[col] = head_dtype.categories.union(tail_dtype.categories)
+    if widened:
+        df = df.assign(**{c: df[c].cat.set_categories(cats) for c, cats in widened.items()})
+        tail = tail.assign(**{c: tail[c].cat.set_categories(cats) for c, cats in widened.items()})
+
+    return pd.concat([df, tail])
+
+
+def extend_dataset(df, meta, csv_path, cache_dir=".cache"):
+    """(df, meta, tail) with the rows appended to csv_path since meta.
+
+    Returns None when csv_path changed in any other way (rewritten, columns
+    changed, appended bytes that do not parse) or no appended line is
+    complete, which calls for a full reload. The extended frame is written
+    back as the new snapshot, and meta only covers the lines parsed.
+    """
+    offset = appended_offset(csv_path, meta)
+    if offset is None:
+        return None
+
+    try:
+        appended = read_appended_rows(csv_path, offset, os.stat(csv_path).st_size, len(df))
+    except ValueError:  # pd.errors.ParserError among others
+        return None
+    if appended is None:
+        # Only an unterminated line: the writer is mid-row, or left the last
+        # row without a line break. A full parse reads it either way, and
+        # its meta then covers the whole file, so later reruns neither hash
+        # this prefix again nor miss the row. Should the line still grow,
+        # the recorded size no longer ends on a line break and the next
+        # change is reparsed in full as well.
+        return None
+    tail, end = appended
+    if list(tail.columns) != list(df.columns):
+        return None
+
+    new_meta = _source_metadata(csv_path, end)
+    df = append_rows(df, tail)
+    write_snapshot(df, snapshot_path_for(csv_path, cache_dir), new_meta)
+    return df, new_meta, tail
+
+
+def load_dataset(csv_path, cache_dir=".cache"):
+    """(df, source metadata) for csv_path.
+
+    Read from the snapshot when it matches the CSV, extended with just the
+    new rows when the CSV has only been appended to, else parsed in full.
+    """
+    snapshot = read_snapshot(snapshot_path_for(csv_path, cache_dir))
+    if snapshot is not None:
+        df, meta = snapshot
+        if _is_fresh(meta, csv_path):
+            return df, meta
+        extended = extend_dataset(df, meta, csv_path, cache_dir)
+        if extended is not None:
+            return extended[:2]
+    return _parse_dataset(csv_path, cache_dir)
+
+
+def _parse_dataset(csv_path, cache_dir):
+    # The full parse behind load_dataset(), written back as the snapshot.
+    df = parse_csv(csv_path)
+    meta = _source_metadata(csv_path)
+    write_snapshot(df, snapshot_path_for(csv_path, cache_dir), meta)
+    return df, meta
+
+
+def refresh_dataset(df, meta, csv_path, cache_dir=".cache"):
+    """Bring a frame returned by load_dataset() up to date with csv_path.
+
+    Returns None when the file is unchanged since meta was recorded or last
+    checked. Otherwise returns
+    (df, meta, tail): tail holds just the appended rows (empty if the file
+    was only touched or does not parse yet), or is None when the file was
+    reloaded in full.
+    """
+    stat = os.stat(csv_path)
+    stamp = (str(stat.st_size), str(stat.st_mtime_ns))
+    if stamp in {
+        (meta.get("source_size"), meta.get("source_mtime_ns")),
+        (meta.get("checked_size"), meta.get("checked_mtime_ns")),
+    }:
+        return None
+    if _is_fresh(meta, csv_path):
+        # Same bytes, new mtime: adopt it so later checks skip the hash.
+        return df, dict(meta, source_mtime_ns=str(stat.st_mtime_ns)), df.iloc[:0]
+
+    extended = extend_dataset(df, meta, csv_path, cache_dir)
+    if extended is not None:
+        return extended
+
+    try:
+        # extend_dataset() has just ruled the snapshot out; parse directly.
+        reloaded, meta = _parse_dataset(csv_path, cache_dir)
+    except ValueError as exc:
+        # Most likely caught mid-write (a quoted field still open); keep
+        # serving the frame we have and try again on the next refresh.
+        # The stamp checked is kept so the file is not hashed and parsed
+        # again before it next changes.
+        warnings.warn(f"Could not reload {csv_path}: {exc}")
+        checked = {"checked_size": stamp[0], "checked_mtime_ns": stamp[1]}
+        return df, dict(meta, **checked), df.iloc[:0]
+    return reloaded, meta, None
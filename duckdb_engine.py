@@ -0,0 +1,315 @@
+# ==============================
+# DUCKDB ENGINE – TV SHOW ANALYTICS
+# ==============================
+"""Section aggregates computed by an embedded DuckDB database.
+
+The dataset (CSV, or Parquet such as synthetic.py writes) is loaded once
+into a DuckDB file under the cache directory, with the derived columns the
+sections group by, and then only ever opened read-only, so any number of
+server processes can share it. Each aggregate of the partial state (see
+cube.py) is then one GROUP BY query over the filtered rows. DuckDB runs it
+multithreaded and spills to disk past its memory limit. Only the small
+result frames come back into Python, so the server never holds the rows
+itself. cube.finalize() turns the state into the same tables the in-memory
+path draws; the row-level queries give the sections that read rows their
+statistics, bin counts and bounded sets of rows. What each query returns is
+listed in engines.py.
+
+duckdb is optional: without it, available() is False and app.py stays on
+the in-memory engine.
+"""
+
+import os
+
+import numpy as np
+
+from cube import AGE_BINS, CUBOIDS, LIKE_MIN_VOTE, STATE_GROUPS, TOTAL_MEASURES, engine_state
+from data import BINGE_MIN_POPULARITY, BINGE_MIN_VOTES, LIST_COLUMNS, LIST_ITEM_PATTERN
+from engines import (
+    ENGINE_DERIVED_COLUMNS,
+    STATE_COLUMNS,
+    cached_dataset,
+    corr_frame,
+    corr_pairs,
+    means_series,
+    profile_frame,
+)
+
+try:
+    import duckdb
+except ImportError:  # optional engine
+    duckdb = None
+
+
+def available():
+    return duckdb is not None
+
+
+# ==============================
+# LOADING
+# ==============================
+def _age_bins_sql(bins):
+    cases = " ".join(
+        f"WHEN user_age > {low} AND user_age <= {high} THEN '{label}'"
+        for low, high, label in bins
+    )
+    return f"CASE {cases} END"
+
+
+def _quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _list_sql(column):
+    # Every quoted item of the stored "['US', 'GB']", either quote style,
+    # without its quotes and with escaped characters (\' and \\) taken as
+    # written, as data.parse_list_column() reads them.
+    return (
+        f"list_transform(regexp_extract_all({column}, {_quote(LIST_ITEM_PATTERN)}),"
+        r" item -> regexp_replace(item[2:-2], '\\(.)', '\1', 'g'))"
+    )
+
+
+def _source_sql(path):
+    if path.endswith(".parquet"):
+        return f"read_parquet({_quote(path)})", "genre_names", "origin_country"
+    return (
+        f"read_csv({_quote(path)}, header = true)",
+        _list_sql("genre_names"),
+        _list_sql("origin_country"),
+    )
+
+
+def _load_sql(path):
+    source, genre_names, origin_country = _source_sql(path)
+    age_bins = " ".join(f"{_age_bins_sql(bins)} AS {name}," for name, bins in AGE_BINS.items())
+    # Every stored column, with ENGINE_DERIVED_COLUMNS recomputed in SQL.
+    # watch_hour is kept as stored: the in-memory loader simulates missing
+    # hours with numpy's generator, which SQL cannot reproduce.
+    derived = ", ".join(f"'{name}'" for name in ENGINE_DERIVED_COLUMNS)
+    binge = (
+        f"coalesce(popularity > {BINGE_MIN_POPULARITY} AND vote_count > {BINGE_MIN_VOTES}, false)"
+    )
+    return f"""
+        CREATE TABLE shows AS
+        SELECT COLUMNS(c -> c NOT IN ({derived})),
+            CAST(year(first_air_date) AS DOUBLE) AS year,
+            CAST(year(first_air_date) AS DOUBLE) AS first_air_year,
+            CAST(floor(year(first_air_date) / 10.0) * 10 AS DOUBLE) AS decade,
+            {age_bins}
+            {binge} AS is_binge,
+            CAST({binge} AS INTEGER) * (1 - user_age / 100.0) AS binge_prob,
+            CAST(coalesce(vote_average > {LIKE_MIN_VOTE}, false) AS DOUBLE) AS likes
+        FROM (
+            SELECT * REPLACE (
+                CAST(first_air_date AS DATE) AS first_air_date,
+                {genre_names} AS genre_names,
+                {origin_country} AS origin_country
+            )
+            FROM {source}
+        )
+    """
+
+
+def _set_temp_directory(con, cache_dir):
+    con.execute(f"SET temp_directory = {_quote(os.path.join(cache_dir, 'duckdb_tmp'))}")
+
+
+def _build(source_path, cache_dir, db_path):
+    con = duckdb.connect(db_path)
+    try:
+        _set_temp_directory(con, cache_dir)
+        con.execute(_load_sql(source_path))
+    finally:
+        con.close()
+
+
+def open_dataset(source_path, cache_dir, source_stamp):
+    """Read-only connection to the cached DuckDB file (see
+    engines.cached_dataset()) holding source_path as table "shows".
+
+    A read-write connection would lock the file against every other process.
+    """
+    db_path = cached_dataset(
+        source_path,
+        cache_dir,
+        source_stamp,
+        ".duckdb",
+        lambda partial: _build(source_path, cache_dir, partial),
+    )
+    con = duckdb.connect(db_path, read_only=True)
+    _set_temp_directory(con, cache_dir)
+    return con
+
+
+def dataset_summary(con):
+    """{"age_min", "age_max", "genres"} of the "shows" table."""
+    cur = con.cursor()
+    age_min, age_max = cur.execute("SELECT min(user_age), max(user_age) FROM shows").fetchone()
+    genres = [
+        row[0]
+        for row in cur.execute(
+            "SELECT DISTINCT unnest(genre_names) AS genre FROM shows ORDER BY genre"
+        ).fetchall()
+    ]
+    return {"age_min": int(age_min), "age_max": int(age_max), "genres": genres}
+
+
+# ==============================
+# PARTIAL STATE QUERIES
+# ==============================
+def _exploded(rows, columns):
+    for column in columns:
+        rows = f"SELECT * EXCLUDE ({column}), unnest({column}) AS {column} FROM ({rows})"
+    return rows
+
+
+def _filtered_rows(age_range, genres, columns="*", conditions=()):
+    conditions = ["true", *conditions]
+    params = []
+    if age_range is not None:
+        conditions.append("user_age BETWEEN ? AND ?")
+        params += list(age_range)
+    if genres:
+        conditions.append("list_has_any(genre_names, ?)")
+        params.append(list(genres))
+    return f"SELECT {columns} FROM shows WHERE {' AND '.join(conditions)}", params
+
+
+def _grouped(cur, relation, keys, measure, params):
+    key_list = ", ".join(keys)
+    not_null = " AND ".join(f"{key} IS NOT NULL" for key in keys)
+    values = (
+        f"coalesce(sum({measure}), 0) AS value_sum, count({measure}) AS value_count"
+        if measure
+        else "count(*) AS value"
+    )
+    return cur.execute(
+        f"SELECT {key_list}, {values} FROM ({relation}) WHERE {not_null} GROUP BY {key_list}"
+        f" ORDER BY {key_list}",
+        params,
+    ).df()
+
+
+def query_state(con, age_range=None, genres=()):
+    """Partial state of the filtered rows: the totals in one SELECT, then one
+    GROUP BY per STATE_GROUPS entry."""
+    cur = con.cursor()
+    rows, params = _filtered_rows(age_range, genres)
+
+    names = ["rows"]
+    values = ["count(*)"]
+    for measure in TOTAL_MEASURES:
+        names += [f"{measure}_sum", f"{measure}_count"]
+        values += [f"coalesce(sum({measure}), 0)", f"count({measure})"]
+    totals = cur.execute(f"SELECT {', '.join(values)} FROM ({rows})", params).fetchone()
+
+    frames = [
+        # One GROUP BY per group, over the rows unnested into the cuboid's.
+        _grouped(cur, _exploded(rows, CUBOIDS[cuboid][0]), keys, measure, params)
+        for cuboid, keys, measure in STATE_GROUPS.values()
+    ]
+    return engine_state(dict(zip(names, totals)), frames)
+
+
+# ==============================
+# ROW-LEVEL QUERIES
+# ==============================
+def query_profile(con, age_range=None, genres=(), numeric=()):
+    """Column profile in one aggregate SELECT over the filtered rows."""
+    cur = con.cursor()
+    rows, params = _filtered_rows(age_range, genres)
+    columns = [
+        row[0]
+        for row in cur.execute("DESCRIBE shows").fetchall()
+        if row[0] not in STATE_COLUMNS
+    ]
+    # In engines.PROFILE_STATS order.
+    stats = [
+        "count({})",
+        "avg({})",
+        "stddev_samp({})",
+        "min({})",
+        "max({})",
+        "quantile_cont({}, 0.25)",
+        "quantile_cont({}, 0.75)",
+    ]
+    selects = [f"count(*) - count({column})" for column in columns] + [
+        template.format(column) for column in numeric for template in stats
+    ]
+    values = cur.execute(f"SELECT {', '.join(selects)} FROM ({rows})", params).fetchone()
+    return profile_frame(columns, numeric, values)
+
+
+def query_bins(con, age_range, genres, column, low, scale, bins):
+    """Bin counts of column from a GROUP BY over the clipped bin numbers."""
+    rows, params = _filtered_rows(age_range, genres, column, [f"{column} IS NOT NULL"])
+    frame = con.cursor().execute(
+        f"""
+        SELECT bin, count(*) AS rows, sum(position - bin) AS fracs FROM (
+            SELECT position, CAST(least(greatest(floor(position), 0), ?) AS BIGINT) AS bin
+            FROM (SELECT ({column} - ?) * ? AS position FROM ({rows}))
+        ) GROUP BY bin ORDER BY bin
+        """,
+        [bins - 1, low, scale, *params],
+    ).df()
+    return frame["bin"].to_numpy(), frame["rows"].to_numpy(float), frame["fracs"].to_numpy(float)
+
+
+def _with_lists(frame):
+    # LIST values come back as arrays; hand them on as plain lists.
+    for column in frame.columns.intersection(LIST_COLUMNS):
+        frame[column] = [v.tolist() if isinstance(v, np.ndarray) else v for v in frame[column]]
+    return frame
+
+
+def query_rows(con, age_range=None, genres=(), columns=None, limit=None, outside=None):
+    """Matching rows, ordered by rowid (the order they were loaded in)."""
+    conditions, extra = [], []
+    if outside is not None:
+        column, low, high = outside
+        conditions.append(f"({column} < ? OR {column} > ?)")
+        extra = [low, high]
+    rows, params = _filtered_rows(
+        age_range,
+        genres,
+        ", ".join(columns) if columns else f"* EXCLUDE ({', '.join(STATE_COLUMNS)})",
+        conditions,
+    )
+    order = " ORDER BY rowid" + (f" LIMIT {int(limit)}" if limit is not None else "")
+    # The extra condition comes before the filters' in the query text.
+    frame = con.cursor().execute(rows + order, extra + params).df()
+    return _with_lists(frame)
+
+
+def query_sample(con, age_range, genres, columns, n):
+    """Every k-th matching row, numbered by a window over rowid, with the
+    total counted by a second window in the same query."""
+    present = [f"{column} IS NOT NULL" for column in columns]
+    rows, params = _filtered_rows(
+        age_range,
+        genres,
+        ", ".join(columns)
+        + ", row_number() OVER (ORDER BY rowid) - 1 AS position, count(*) OVER () AS total",
+        present,
+    )
+    frame = con.cursor().execute(
+        f"SELECT * FROM ({rows}) WHERE position % ((total + ? - 1) // ?) = 0 ORDER BY position",
+        [*params, n, n],
+    ).df()
+    total = int(frame["total"].iloc[0]) if len(frame) else 0
+    return frame[columns], total
+
+
+def query_corr(con, age_range, genres, columns):
+    """Correlations from one SELECT of corr() per pair of columns."""
+    rows, params = _filtered_rows(age_range, genres)
+    pairs = ", ".join(f"corr({a}, {b})" for a, b in corr_pairs(columns))
+    values = con.cursor().execute(f"SELECT {pairs} FROM ({rows})", params).fetchone()
+    return corr_frame(columns, values)
+
+
+def query_means(con, age_range, genres, key, column):
+    """Means per key from the GROUP BY the state queries use."""
+    rows, params = _filtered_rows(age_range, genres)
+    return means_series(_grouped(con.cursor(), rows, [key], column, params), key, column)
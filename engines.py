@@ -0,0 +1,103 @@
+# ==============================
+# QUERY ENGINES – TV SHOW ANALYTICS
+# ==============================
+"""What the query engines (duckdb_engine.py, polars_engine.py) share.
+
+Each engine module answers the same calls, taking the handle its
+open_dataset() returns and a filter (age_range, a (low, high) pair of
+user_age or None; genres, rows listing any of them count):
+
+    query_state(handle, age_range, genres)
+        partial state, as cube.cube_state() gives it
+    query_profile(handle, age_range, genres, numeric)
+        frame indexed by the columns: "missing" of every column; count,
+        mean, std, min, max and quartiles (q1, q3, interpolated as pandas
+        does) of the numeric ones
+    query_bins(handle, age_range, genres, column, low, scale, bins)
+        (bin, rows, fracs) arrays: each value sits at (value - low) * scale
+        and in the bin below that, clipped to 0 ... bins - 1; rows counts a
+        bin's values and fracs sums how far past the bin they sit
+    query_rows(handle, age_range, genres, columns, limit, outside)
+        the matching rows in file order, with the given columns (default
+        all): only those whose outside[0] is below outside[1] or above
+        outside[2] when given, and at most limit of them
+    query_sample(handle, age_range, genres, columns, n)
+        (sample, total): of the total matching rows with all of columns
+        present, every k-th in file order, k the smallest keeping at most n
+    query_corr(handle, age_range, genres, columns)
+        pairwise Pearson correlations, as DataFrame.corr() gives them
+    query_means(handle, age_range, genres, key, column)
+        mean of column per value of key, as groupby(key)[column].mean()
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from caching import build_once, remove_stale
+from cube import AGE_BINS
+
+# Recomputed on load, whether or not the source stores them (as
+# data.DERIVED_COLUMNS derives them, plus the likes measure).
+ENGINE_DERIVED_COLUMNS = [
+    "year", "first_air_year", "decade", *AGE_BINS, "is_binge", "binge_prob", "likes",
+]
+# Measures only the state queries read, left out of the rows shown.
+STATE_COLUMNS = ["likes"]
+# Part of the cached files' names; bump it when what a load writes changes,
+# so files written by an earlier version are rebuilt.
+DATASET_VERSION = 2
+# query_profile() statistics of the numeric columns, in this order.
+PROFILE_STATS = ["count", "mean", "std", "min", "max", "q1", "q3"]
+
+
+def cached_dataset(source_path, cache_dir, source_stamp, suffix, build):
+    """Path of the file under cache_dir that build(partial_path) writes
+    source_path into, built on first use.
+
+    The file name carries a digest of source_stamp (anything identifying the
+    source version, e.g. its size and mtime) and DATASET_VERSION, so a
+    changed source is built again and the file for the earlier version is
+    deleted.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    prefix = os.path.basename(source_path) + "."
+    digest = hashlib.sha1(repr((DATASET_VERSION, source_stamp)).encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"{prefix}{digest}{suffix}")
+    if not os.path.exists(path):
+        build_once(path, build, os.path.join(cache_dir, f"{prefix}{suffix.lstrip('.')}.lock"))
+        remove_stale(cache_dir, prefix, suffix, keep=path)
+    return path
+
+
+def profile_frame(columns, numeric, values):
+    """query_profile()'s frame from one row of values: the missing count of
+    each of columns, then PROFILE_STATS of each of numeric."""
+    profile = pd.DataFrame(index=columns, columns=PROFILE_STATS, dtype=float)
+    profile.loc[list(numeric)] = np.array(values[len(columns):], dtype=float).reshape(
+        len(numeric), len(PROFILE_STATS)
+    )
+    return profile.assign(missing=np.array(values[:len(columns)], dtype=np.int64))
+
+
+def corr_pairs(columns):
+    """The (a, b) pairs query_corr() computes: each pair once, with the
+    diagonal."""
+    return [(a, b) for i, a in enumerate(columns) for b in columns[i:]]
+
+
+def corr_frame(columns, values):
+    """Symmetric correlation matrix from one value per corr_pairs() pair;
+    None (too few rows) becomes NaN."""
+    corr = pd.DataFrame(np.nan, index=columns, columns=columns)
+    for (a, b), value in zip(corr_pairs(columns), values):
+        corr.loc[a, b] = corr.loc[b, a] = np.nan if value is None else value
+    return corr
+
+
+def means_series(frame, key, column):
+    """query_means()'s result from a grouped frame with key, value_sum and
+    value_count columns."""
+    return (frame["value_sum"] / frame["value_count"]).set_axis(frame[key]).rename(column)
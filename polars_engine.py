@@ -0,0 +1,283 @@
+# ==============================
+# POLARS ENGINE – TV SHOW ANALYTICS
+# ==============================
+"""Section aggregates computed by Polars lazy queries.
+
+The dataset (CSV, or Parquet such as synthetic.py writes) is converted once
+into a typed Parquet file under the cache directory, with real list columns
+and the derived columns the sections group by. Each aggregate of the partial
+state (see cube.py) is then a lazy filter -> explode -> group_by over that
+file. All of them are collected together, so Polars scans the file once,
+reads only the columns a query names, pushes the filters into the scan and
+runs the groups on all cores. Only the small result frames come back into
+pandas; cube.finalize() turns the state into the same tables the in-memory
+path draws. The row-level queries give the sections that read rows their
+statistics, bin counts and bounded sets of rows the same way. What each query
+returns is listed in engines.py.
+
+polars is optional: without it, available() is False and app.py stays on
+the in-memory engine.
+"""
+
+from cube import AGE_BINS, CUBOIDS, LIKE_MIN_VOTE, STATE_GROUPS, TOTAL_MEASURES, engine_state
+from data import BINGE_MIN_POPULARITY, BINGE_MIN_VOTES, LIST_ITEM_PATTERN
+from engines import (
+    ENGINE_DERIVED_COLUMNS,
+    STATE_COLUMNS,
+    cached_dataset,
+    corr_frame,
+    corr_pairs,
+    means_series,
+    profile_frame,
+)
+
+try:
+    import polars as pl
+except ImportError:  # optional engine
+    pl = None
+
+
+def available():
+    return pl is not None
+
+
+# ==============================
+# LOADING
+# ==============================
+def _age_bins(bins):
+    age = pl.col("user_age")
+    return pl.coalesce([
+        pl.when((age > low) & (age <= high)).then(pl.lit(label)) for low, high, label in bins
+    ])
+
+
+def _list(column):
+    # Every quoted item of the stored "['US', 'GB']" literal, either quote
+    # style, without its quotes and with escaped characters (\' and \\)
+    # taken as written, as data.parse_list_column() reads them.
+    item = pl.element()
+    return pl.col(column).str.extract_all(LIST_ITEM_PATTERN).list.eval(
+        item.str.slice(1, item.str.len_chars() - 2).str.replace_all(r"\\(.)", "$1")
+    )
+
+
+def _source(path):
+    if path.endswith(".parquet"):
+        return pl.scan_parquet(path).with_columns(pl.col("first_air_date").cast(pl.Date))
+    text = {col: pl.String for col in ["first_air_date", "genre_names", "origin_country"]}
+    return pl.scan_csv(path, schema_overrides=text).with_columns(
+        pl.col("first_air_date").str.to_date(strict=False),
+        _list("genre_names"),
+        _list("origin_country"),
+    )
+
+
+def _with_derived(shows):
+    # Every stored column, with ENGINE_DERIVED_COLUMNS recomputed as
+    # expressions; watch_hour is read as stored, since its simulated draw
+    # cannot be repeated here.
+    year = pl.col("first_air_date").dt.year().cast(pl.Float64)
+    binge = (pl.col("popularity") > BINGE_MIN_POPULARITY) & (
+        pl.col("vote_count") > BINGE_MIN_VOTES
+    )
+    return shows.select(pl.exclude(ENGINE_DERIVED_COLUMNS)).with_columns(
+        year.alias("year"),
+        year.alias("first_air_year"),
+        ((year // 10) * 10).alias("decade"),
+        *[_age_bins(bins).alias(name) for name, bins in AGE_BINS.items()],
+        binge.fill_null(False).alias("is_binge"),
+        (binge.fill_null(False).cast(pl.Float64) * (1 - pl.col("user_age") / 100))
+        .alias("binge_prob"),
+        (pl.col("vote_average") > LIKE_MIN_VOTE).fill_null(False).cast(pl.Float64)
+        .alias("likes"),
+    )
+
+
+def open_dataset(source_path, cache_dir, source_stamp):
+    """Path of the cached Parquet file (see engines.cached_dataset())
+    holding source_path with its derived columns; the queries scan it
+    lazily, so the path is all the handle needs to be."""
+    return cached_dataset(
+        source_path,
+        cache_dir,
+        source_stamp,
+        ".parquet",
+        lambda partial: _with_derived(_source(source_path)).sink_parquet(partial),
+    )
+
+
+def dataset_summary(path):
+    """{"age_min", "age_max", "genres"} of the Parquet file at path."""
+    shows = pl.scan_parquet(path)
+    ages, genres = pl.collect_all([
+        shows.select(pl.col("user_age").min().alias("min"), pl.col("user_age").max().alias("max")),
+        shows.select(pl.col("genre_names").explode().drop_nulls().unique().sort()),
+    ])
+    return {
+        "age_min": int(ages["min"][0]),
+        "age_max": int(ages["max"][0]),
+        "genres": genres["genre_names"].to_list(),
+    }
+
+
+# ==============================
+# PARTIAL STATE QUERIES
+# ==============================
+def _exploded(rows, columns):
+    for column in columns:
+        # Rows with an empty list drop out, as they do from the long tables.
+        rows = rows.explode(column).filter(pl.col(column).is_not_null())
+    return rows
+
+
+def _filtered_rows(path, age_range=None, genres=()):
+    rows = pl.scan_parquet(path)
+    if age_range is not None:
+        rows = rows.filter(pl.col("user_age").is_between(*age_range))
+    if genres:
+        rows = rows.filter(
+            pl.col("genre_names").list.eval(pl.element().is_in(list(genres))).list.any()
+        )
+    return rows
+
+
+def _grouped(rows, keys, measure):
+    if measure:
+        values = [
+            pl.col(measure).sum().cast(pl.Float64).alias("value_sum"),
+            pl.col(measure).count().cast(pl.Int64).alias("value_count"),
+        ]
+    else:
+        values = [pl.len().cast(pl.Int64).alias("value")]
+    return (
+        rows.filter(pl.all_horizontal(pl.col(keys).is_not_null()))
+        .group_by(keys)
+        .agg(values)
+        .sort(keys)
+    )
+
+
+def query_state(path, age_range=None, genres=()):
+    """Partial state of the filtered rows: the totals and one group_by per
+    STATE_GROUPS entry, collected together in a single scan."""
+    rows = _filtered_rows(path, age_range, genres)
+    totals = rows.select(
+        pl.len().cast(pl.Float64).alias("rows"),
+        *[
+            aggregate
+            for measure in TOTAL_MEASURES
+            for aggregate in [
+                pl.col(measure).sum().cast(pl.Float64).alias(f"{measure}_sum"),
+                pl.col(measure).count().cast(pl.Float64).alias(f"{measure}_count"),
+            ]
+        ],
+    )
+    queries = [
+        # Each cuboid's rows: one per item of its exploded list columns.
+        _grouped(_exploded(rows, CUBOIDS[cuboid][0]), keys, measure)
+        for cuboid, keys, measure in STATE_GROUPS.values()
+    ]
+    totals, *frames = pl.collect_all([totals, *queries])
+    return engine_state(totals.row(0, named=True), [frame.to_pandas() for frame in frames])
+
+
+# ==============================
+# ROW-LEVEL QUERIES
+# ==============================
+def query_profile(path, age_range=None, genres=(), numeric=()):
+    """Column profile from one select over the filtered scan."""
+    rows = _filtered_rows(path, age_range, genres)
+    columns = [column for column in rows.collect_schema().names() if column not in STATE_COLUMNS]
+    # In engines.PROFILE_STATS order.
+    stats = [
+        lambda col: col.count(),
+        lambda col: col.mean(),
+        lambda col: col.std(ddof=1),
+        lambda col: col.min(),
+        lambda col: col.max(),
+        lambda col: col.quantile(0.25, interpolation="linear"),
+        lambda col: col.quantile(0.75, interpolation="linear"),
+    ]
+    values = rows.select(
+        *[pl.col(column).null_count().alias(f"missing_{column}") for column in columns],
+        *[
+            stat(pl.col(column)).cast(pl.Float64).alias(f"{i}_{column}")
+            for column in numeric
+            for i, stat in enumerate(stats)
+        ],
+    ).collect().row(0)
+    return profile_frame(columns, numeric, values)
+
+
+def query_bins(path, age_range, genres, column, low, scale, bins):
+    """Bin counts of column from a lazy group_by over the clipped bin
+    numbers."""
+    position = (pl.col(column).cast(pl.Float64) - low) * scale
+    frame = (
+        _filtered_rows(path, age_range, genres)
+        .filter(pl.col(column).is_not_null())
+        .select(position.alias("position"))
+        .with_columns(pl.col("position").floor().clip(0, bins - 1).cast(pl.Int64).alias("bin"))
+        .group_by("bin")
+        .agg(pl.len().alias("rows"), (pl.col("position") - pl.col("bin")).sum().alias("fracs"))
+        .sort("bin")
+        .collect()
+    )
+    return (
+        frame["bin"].to_numpy(),
+        frame["rows"].to_numpy().astype(float),
+        frame["fracs"].to_numpy(),
+    )
+
+
+def _to_pandas(frame):
+    # List columns as plain lists, not the arrays to_pandas() gives.
+    lists = {
+        column: frame[column].to_list()
+        for column, dtype in frame.schema.items()
+        if isinstance(dtype, pl.List)
+    }
+    return frame.to_pandas().assign(**lists)
+
+
+def query_rows(path, age_range=None, genres=(), columns=None, limit=None, outside=None):
+    """Matching rows in scan order, which is the file's; the limit is pushed
+    into the scan as a head()."""
+    rows = _filtered_rows(path, age_range, genres)
+    if outside is not None:
+        column, low, high = outside
+        rows = rows.filter((pl.col(column) < low) | (pl.col(column) > high))
+    rows = rows.select(columns or pl.exclude(STATE_COLUMNS))
+    if limit is not None:
+        rows = rows.head(limit)
+    return _to_pandas(rows.collect())
+
+
+def query_sample(path, age_range, genres, columns, n):
+    """Every k-th matching row: the rows are counted in one lazy scan and
+    only the sampled ones collected in a second, so at most n leave
+    Polars."""
+    rows = (
+        _filtered_rows(path, age_range, genres)
+        .select(columns)
+        .filter(pl.all_horizontal(pl.col(columns).is_not_null()))
+    )
+    total = rows.select(pl.len()).collect().item()
+    step = max(-(-total // n), 1)
+    return rows.gather_every(step).collect().to_pandas(), total
+
+
+def query_corr(path, age_range, genres, columns):
+    """Correlations from one select of pl.corr() per pair of columns."""
+    rows = _filtered_rows(path, age_range, genres)
+    values = rows.select(
+        pl.corr(pl.col(a).cast(pl.Float64), pl.col(b).cast(pl.Float64)).alias(f"{i}")
+        for i, (a, b) in enumerate(corr_pairs(columns))
+    ).collect().row(0)
+    return corr_frame(columns, values)
+
+
+def query_means(path, age_range, genres, key, column):
+    """Means per key from the group_by the state queries use."""
+    frame = _grouped(_filtered_rows(path, age_range, genres), [key], column).collect().to_pandas()
+    return means_series(frame, key, column)
@@ -0,0 +1,35 @@
+# ==============================
+# STREAMED AGGREGATES – TV SHOW ANALYTICS
+# ==============================
+"""Section aggregates for CSVs too large to load, built chunk by chunk.
+
+Each chunk is rolled up into a cube and reduced to its partial state (see
+cube.py). Partial states merge by addition, so memory is one chunk plus the
+distinct keys, whatever the file size; cube.finalize() then gives the
+section tables for the whole (unfiltered) data set.
+"""
+
+from cube import build_cube, cube_state
+from data import LIST_COLUMNS, iter_csv_chunks, list_long_table
+
+
+def chunk_partials(chunk):
+    """Partial state for one prepare_frame()d chunk of rows."""
+    long_tables = {col: list_long_table(chunk[col]) for col in LIST_COLUMNS}
+    return cube_state(build_cube(chunk, long_tables))
+
+
+def merge_partials(state, other):
+    """Combine two partial states (either may be None)."""
+    if state is None:
+        return other
+    if other is None:
+        return state
+    return {key: state[key].add(other[key], fill_value=0) for key in state}
+
+
+def stream_partials(csv_path, chunk_rows):
+    state = None
+    for chunk in iter_csv_chunks(csv_path, chunk_rows):
+        state = merge_partials(state, chunk_partials(chunk))
+    return state
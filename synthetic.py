@@ -0,0 +1,225 @@
+# ==============================
+# SYNTHETIC DATASETS – TV SHOW ANALYTICS
+# ==============================
+"""Datasets of any size that look like the shipped CSV, for scaling tests.
+
+Rows pair a show with a user session, and the two sides are drawn
+independently, as they are in the shipped data. Each side is a smoothed
+bootstrap: a real row is picked as a template and its numeric columns are
+jittered with Gaussian noise of Scott's bandwidth in a transformed space.
+That samples from a kernel density estimate of the columns' joint
+distribution. Genre and country lists, language, names and the like come
+with the template, so genre x country combinations stay realistic. Derived
+columns are recomputed from data.DERIVED_COLUMNS, so they agree with what
+the dashboard would derive.
+
+Output is generated and written chunk by chunk, so memory stays at one
+chunk whatever the row count. The same seed and chunk size always give the
+same rows.
+
+    python synthetic.py 1000000 --out synthetic_1m --format csv parquet
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from data import (
+    CATEGORICAL_COLUMNS,
+    DERIVED_COLUMNS,
+    LIST_COLUMNS,
+    add_derived_columns,
+    parse_list_column,
+    to_list_series,
+)
+from kde import scott_bandwidth
+
+SOURCE_CSV = "10k_Poplar_Tv_Shows_with_users_updated6.csv"
+SEED = 42
+CHUNK_ROWS = 100_000
+FORMATS = ["csv", "parquet", "arrow"]
+
+# The user-session side of a row; every other stored column describes the
+# show. watch_hour rides along with its session (it correlates with
+# session length) and is kept by add_derived_columns() as a valid stored hour.
+USER_COLUMNS = ["user_age", "user_category", "session_duration_min", "watch_hour"]
+
+# Jittered show columns: (to the jitter space, back, decimals kept).
+_EPOCH = pd.Timestamp("1970-01-01")
+SHOW_NUMERIC = {
+    "popularity": (np.log, np.exp, 4),
+    "vote_average": (lambda x: x, lambda x: x, 3),
+    "vote_count": (np.log1p, np.expm1, 0),
+    "first_air_date": (
+        lambda dates: (pd.to_datetime(dates, errors="coerce") - _EPOCH).dt.days.to_numpy(float),
+        lambda days: pd.Series(_EPOCH + pd.to_timedelta(np.round(days), unit="D")),
+        None,
+    ),
+}
+
+
+# ==============================
+# FITTING
+# ==============================
+def fit(raw):
+    """What generate() draws from, learned from rows as read by pd.read_csv
+    (list columns still as text)."""
+    derived = [col for col in raw.columns if col in DERIVED_COLUMNS and col not in USER_COLUMNS]
+    shows = raw.drop(columns=USER_COLUMNS + derived).reset_index(drop=True)
+    users = raw[USER_COLUMNS].reset_index(drop=True)
+
+    latent = np.column_stack([
+        forward(shows[col]) for col, (forward, _, _) in SHOW_NUMERIC.items()
+    ])
+    # Scott's rule for a d-dimensional product kernel.
+    factor = len(latent) ** (-1 / (latent.shape[1] + 4))
+    bounds = {
+        col: (np.nanmin(latent[:, j]), np.nanmax(latent[:, j]))
+        for j, col in enumerate(SHOW_NUMERIC)
+    }
+    durations = users["session_duration_min"].to_numpy(float)
+
+    return {
+        "columns": list(raw.columns),
+        "shows": shows,
+        "latent": latent,
+        "bandwidths": np.nanstd(latent, axis=0, ddof=1) * factor,
+        "bounds": bounds,
+        "users": users,
+        "duration_bandwidth": scott_bandwidth(durations[~np.isnan(durations)]),
+        "duration_bounds": (np.nanmin(durations), np.nanmax(durations)),
+    }
+
+
+# ==============================
+# GENERATING
+# ==============================
+def _show_rows(model, picks, rng):
+    rows = model["shows"].iloc[picks].reset_index(drop=True)
+    latent = model["latent"][picks]
+    latent = latent + rng.standard_normal(latent.shape) * model["bandwidths"]
+    # Shows nobody voted on keep their 0 votes and 0 average.
+    unvoted = rows["vote_count"].to_numpy() == 0
+
+    for j, (col, (_, back, decimals)) in enumerate(SHOW_NUMERIC.items()):
+        values = back(np.clip(latent[:, j], *model["bounds"][col]))
+        if col == "first_air_date":
+            rows[col] = values.dt.strftime("%Y-%m-%d")
+            continue
+        values = np.round(values, decimals)
+        if col in ("vote_count", "vote_average"):
+            values = np.where(unvoted, rows[col], values)
+        rows[col] = values.astype(rows[col].dtype)
+    return rows
+
+
+def _user_rows(model, picks, rng):
+    rows = model["users"].iloc[picks].reset_index(drop=True)
+    durations = rows["session_duration_min"] + rng.standard_normal(len(rows)) * model[
+        "duration_bandwidth"
+    ]
+    rows["session_duration_min"] = np.clip(durations, *model["duration_bounds"])
+    return rows
+
+
+def _with_derived(rows):
+    typed = rows[["user_age", "popularity", "vote_count", "watch_hour"]].assign(
+        first_air_date=pd.to_datetime(rows["first_air_date"], errors="coerce")
+    )
+    typed = add_derived_columns(typed)
+    return rows.assign(**{
+        col: typed[col] for col in DERIVED_COLUMNS if col not in rows.columns
+    })
+
+
+def generate(model, rows, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """Yield frames of up to chunk_rows rows, rows in total, shaped like the
+    source CSV as pd.read_csv returns it. ids are 1..rows."""
+    rng = np.random.default_rng(seed)
+    columns = model["columns"]
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        shows = _show_rows(model, rng.integers(0, len(model["shows"]), n), rng)
+        users = _user_rows(model, rng.integers(0, len(model["users"]), n), rng)
+        chunk = _with_derived(pd.concat([shows, users], axis=1))
+        chunk["id"] = np.arange(start + 1, start + n + 1)
+        yield chunk[[col for col in columns if col in chunk.columns]]
+
+
+# ==============================
+# WRITING
+# ==============================
+def _columnar(chunk):
+    """Arrow table for a chunk, with real list, date and string types."""
+    frame = chunk.copy()
+    for col in LIST_COLUMNS:
+        offsets, values, valid = parse_list_column(frame[col])
+        frame[col] = to_list_series(offsets, values, valid, index=frame.index)
+    for col in CATEGORICAL_COLUMNS + ["age_group"]:
+        if col in frame.columns:
+            frame[col] = frame[col].astype(object)
+    frame["first_air_date"] = pd.to_datetime(frame["first_air_date"], errors="coerce")
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def _stable_schema(table):
+    # A chunk may hold only missing values for a text column; keep the
+    # column a string so later chunks fit the same schema.
+    return pa.schema([
+        field.with_type(pa.large_string()) if pa.types.is_null(field.type) else field
+        for field in table.schema
+    ])
+
+
+def write_dataset(model, rows, paths, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """Generate rows once and write them to every {format: path} in paths."""
+    writers = {}
+    schema = None
+    try:
+        for i, chunk in enumerate(generate(model, rows, seed, chunk_rows)):
+            if "csv" in paths:
+                chunk.to_csv(paths["csv"], mode="w" if i == 0 else "a", header=i == 0, index=False)
+            columnar = [fmt for fmt in ("parquet", "arrow") if fmt in paths]
+            if not columnar:
+                continue
+            table = _columnar(chunk)
+            if schema is None:
+                schema = _stable_schema(table)
+                for fmt in columnar:
+                    writers[fmt] = (
+                        pq.ParquetWriter(paths[fmt], schema)
+                        if fmt == "parquet"
+                        else ipc.new_file(paths[fmt], schema)
+                    )
+            table = table.cast(schema)
+            for writer in writers.values():
+                writer.write_table(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--source", default=SOURCE_CSV, help="CSV to learn from")
+    parser.add_argument("--out", help="output path without extension")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["csv"])
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    stem = args.out or f"synthetic_{args.rows}"
+    paths = {fmt: f"{stem}.{fmt}" for fmt in args.format}
+    write_dataset(fit(pd.read_csv(args.source)), args.rows, paths, args.seed, args.chunk_rows)
+    for path in paths.values():
+        print(f"{path}: {os.path.getsize(path):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
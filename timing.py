@@ -0,0 +1,49 @@
+# ==============================
+# SPAN TIMING – TV SHOW ANALYTICS
+# ==============================
+"""Wall and CPU time for the named steps of a rerun.
+
+A rerun keeps a plain list of spans, one dict per timed step with its wall
+and CPU milliseconds plus whatever counts the step reports (rows in, rows
+out). CPU time is the calling thread's, since every Streamlit session runs
+in a thread of the same process. log_spans() writes one JSON line per rerun.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def clock():
+    return time.perf_counter(), time.thread_time()
+
+
+def elapsed(started):
+    """{"wall_ms", "cpu_ms"} since started, a clock() reading."""
+    wall, cpu = clock()
+    return {
+        "wall_ms": round((wall - started[0]) * 1000, 3),
+        "cpu_ms": round((cpu - started[1]) * 1000, 3),
+    }
+
+
+def record(spans, name, started, **counts):
+    spans.append({"span": name, **elapsed(started), **counts})
+
+
+@contextmanager
+def span(spans, name, **counts):
+    """Time the block as one span. Yields the span's counts, so the block
+    can add the ones it only knows at the end (e.g. rows returned)."""
+    started = clock()
+    try:
+        yield counts
+    finally:
+        record(spans, name, started, **counts)
+
+
+def log_spans(spans, **context):
+    logger.info(json.dumps({**context, "spans": spans}, default=str))